@@ -0,0 +1,173 @@
+"""
+artifact_store.py
+-----------------
+Bounded store for the WAV files the bridge hands to Unity.
+
+Replies are written into StreamingAssets so Unity can load them by path.
+Left alone, that directory grows by a file per sentence and per reply for
+as long as the bridge runs.  `ArtifactStore` owns the directory:
+
+    * names are monotonic and unique: `<prefix>_<start ms>_<seq>.wav`,
+      where the start stamp is kept above any name already on disk, so
+      two files never collide even across restarts or a clock step back;
+    * every file is written to a hidden temp name and renamed into place,
+      so Unity never sees a half-written WAV;
+    * once the directory holds more than `max_files` files or `max_bytes`
+      bytes, the oldest are deleted first, skipping files that are pinned
+      by a response still in flight.  Pins are leases: a pin nobody
+      releases (e.g. a sentence that finished after its turn timed out)
+      lapses after `lease_secs`.
+
+Public API
+----------
+    store = ArtifactStore(directory, max_bytes=256 * 2**20, max_files=256)
+    path = store.write(lambda tmp: write_wav(tmp, samples, rate))   # returned pinned
+    store.pin(path) -> bool        # False if the file is already gone
+    store.release(path)
+    store.discard(path)            # delete now (e.g. sentence clips after merging)
+    store.stats() -> dict
+"""
+
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger("artifact-store")
+
+
+class ArtifactStore:
+    """Oldest-first, pin-aware eviction over one output directory. Thread-safe."""
+
+    def __init__(self, directory: str, prefix: str = "monika_resp", suffix: str = ".wav",
+                 max_bytes: int = 256 * 2**20, max_files: int = 256, lease_secs: float = 300.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix
+        self.max_bytes = int(max_bytes)
+        self.max_files = max(1, int(max_files))
+        self.lease_secs = float(lease_secs)
+        self._lock = threading.Lock()
+        self._files: OrderedDict[str, int] = OrderedDict()  # path -> size, oldest first
+        self._bytes = 0
+        self._pins: dict[str, list] = {}  # path -> [holders, lease expiry]
+        self._seq = itertools.count()
+        self.evicted = 0
+        os.makedirs(directory, exist_ok=True)
+        self._stamp = max(time.time_ns() // 1_000_000, self._scan() + 1)
+
+    def write(self, write_fn) -> str:
+        """Have `write_fn(tmp_path)` produce the file, then move it into place; returns its (pinned) path."""
+        name = f"{self.prefix}_{self._stamp}_{next(self._seq):06d}{self.suffix}"
+        path = os.path.join(self.directory, name).replace("\\", "/")
+        tmp = os.path.join(self.directory, f".{name}.tmp")
+        try:
+            write_fn(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        size = os.path.getsize(path)
+        with self._lock:
+            self._files[path] = size
+            self._bytes += size
+            self._pins[path] = [1, time.monotonic() + self.lease_secs]
+            victims = self._select_victims()
+        self._delete(victims)
+        return path
+
+    def pin(self, path: str) -> bool:
+        with self._lock:
+            if path not in self._files:
+                return False
+            pin = self._pins.setdefault(path, [0, 0.0])
+            pin[0] += 1
+            pin[1] = time.monotonic() + self.lease_secs
+            return True
+
+    def release(self, path: str):
+        with self._lock:
+            pin = self._pins.get(path)
+            if pin is None:
+                return
+            pin[0] -= 1
+            if pin[0] <= 0:
+                del self._pins[path]
+            victims = self._select_victims()
+        self._delete(victims)
+
+    def discard(self, path: str):
+        with self._lock:
+            size = self._files.pop(path, None)
+            if size is None:
+                return
+            self._bytes -= size
+            self._pins.pop(path, None)
+        self._delete([path])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"files": len(self._files), "bytes": self._bytes, "pinned": len(self._pins),
+                    "evicted": self.evicted}
+
+    # ---- internals ----
+
+    def _select_victims(self) -> list[str]:
+        """Unindex the oldest unpinned files until back under budget (lock held); caller deletes them."""
+        victims = []
+        now = time.monotonic()
+        for path in list(self._files):
+            if len(self._files) <= self.max_files and self._bytes <= self.max_bytes:
+                break
+            pin = self._pins.get(path)
+            if pin is not None:
+                if now < pin[1]:
+                    continue
+                del self._pins[path]  # lease lapsed
+            self._bytes -= self._files.pop(path)
+            victims.append(path)
+        self.evicted += len(victims)
+        return victims
+
+    @staticmethod
+    def _delete(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Most likely Unity still has it open (Windows); it will be retried as an orphan next start
+                log.warning("Could not delete %s: %s", path, e)
+
+    def _scan(self) -> int:
+        """Index files left by earlier runs (oldest first) and drop stale temp files; returns the newest stamp seen."""
+        pattern = re.compile(rf"^{re.escape(self.prefix)}_(\d+)_\d+{re.escape(self.suffix)}$")
+        entries = []
+        newest = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(f".{self.prefix}_") and entry.name.endswith(".tmp"):
+                self._delete([entry.path])
+                continue
+            m = pattern.match(entry.name)
+            if m is None and not (entry.name.startswith(f"{self.prefix}_") and entry.name.endswith(self.suffix)):
+                continue
+            if m is not None:
+                newest = max(newest, int(m.group(1)))
+            st = entry.stat()
+            entries.append((st.st_mtime, entry.name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._files[os.path.join(self.directory, name).replace("\\", "/")] = size
+            self._bytes += size
+        victims = self._select_victims()
+        self._delete(victims)
+        if entries:
+            log.info("Artifact store %s: %d file(s), %.1f MB after evicting %d left from earlier runs",
+                     self.directory, len(self._files), self._bytes / 2**20, len(victims))
+        return newest
@@ -0,0 +1,152 @@
+"""
+asr_engines.py
+--------------
+Speech-recognition backends for the Whisper server.
+
+Every engine takes a batch of mono float32 16 kHz clips and returns one
+(text, avg_logprob, no_speech_prob) tuple per clip, so the server's
+batching and cascade logic do not care which runtime answers.
+
+Backends
+--------
+    whisper        : openai-whisper on PyTorch (fp32 on CPU).  Clips that
+                     fit one 30 s window share a single batched decode.
+    faster-whisper : CTranslate2 with quantized weights (compute_type
+                     "int8" by default) for CPU inference.
+
+Public API
+----------
+    engine = load_engine(backend, model_name, threads=0, compute_type="int8")
+    results = engine.transcribe_batch([samples, ...])
+"""
+
+import logging
+import time
+import numpy as np
+
+log = logging.getLogger("asr-engines")
+
+SAMPLE_RATE = 16_000
+BACKENDS = ("whisper", "faster-whisper")
+
+
+class ASREngine:
+    """Base class; subclasses implement `transcribe_batch`."""
+
+    backend = ""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def name(self) -> str:
+        return f"{self.backend}:{self.model_name}"
+
+    def transcribe_batch(self, clips: list[np.ndarray]) -> list[tuple[str, float, float]]:
+        raise NotImplementedError
+
+
+class WhisperTorchEngine(ASREngine):
+    """openai-whisper, fp32 PyTorch inference."""
+
+    backend = "whisper"
+
+    def __init__(self, model_name: str, threads: int = 0):
+        super().__init__(model_name)
+        import torch
+        import whisper
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+        self._torch = torch
+        self._whisper = whisper
+        self.model = whisper.load_model(model_name)
+        self._options = whisper.DecodingOptions(language="en", fp16=False, without_timestamps=True)
+
+    def _transcribe_long(self, samples):
+        """transcribe() for clips longer than one 30 s window."""
+        result = self.model.transcribe(
+            samples,
+            language="en",
+            fp16=False,
+            condition_on_previous_text=False
+        )
+        segments = result.get("segments") or []
+        if not segments:
+            return result["text"].strip(), 0.0, 1.0
+        return (
+            result["text"].strip(),
+            float(np.mean([seg["avg_logprob"] for seg in segments])),
+            float(np.mean([seg["no_speech_prob"] for seg in segments])),
+        )
+
+    def transcribe_batch(self, clips):
+        whisper, torch = self._whisper, self._torch
+        out = [None] * len(clips)
+        short = [i for i, samples in enumerate(clips) if len(samples) <= whisper.audio.N_SAMPLES]
+        if short:
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(clips[i]), self.model.dims.n_mels)
+                for i in short
+            ]).to(self.model.device)
+            with torch.no_grad():
+                results = whisper.decode(self.model, mels, self._options)
+            for i, r in zip(short, results):
+                out[i] = (r.text.strip(), r.avg_logprob, r.no_speech_prob)
+        for i, samples in enumerate(clips):
+            if out[i] is None:
+                out[i] = self._transcribe_long(samples)
+        return out
+
+
+class FasterWhisperEngine(ASREngine):
+    """faster-whisper (CTranslate2) with quantized CPU weights."""
+
+    backend = "faster-whisper"
+
+    def __init__(self, model_name: str, threads: int = 0, compute_type: str = "int8"):
+        super().__init__(model_name)
+        from faster_whisper import WhisperModel
+
+        self.compute_type = compute_type
+        self.model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=threads)
+
+    @property
+    def name(self) -> str:
+        return f"{self.backend}:{self.model_name}:{self.compute_type}"
+
+    def transcribe_batch(self, clips):
+        # CTranslate2 parallelises inside each call across cpu_threads
+        out = []
+        for samples in clips:
+            segments, _ = self.model.transcribe(
+                samples,
+                language="en",
+                beam_size=1,
+                condition_on_previous_text=False,
+                without_timestamps=True,
+            )
+            segments = list(segments)
+            if not segments:
+                out.append(("", 0.0, 1.0))
+                continue
+            out.append((
+                "".join(seg.text for seg in segments).strip(),
+                float(np.mean([seg.avg_logprob for seg in segments])),
+                float(np.mean([seg.no_speech_prob for seg in segments])),
+            ))
+        return out
+
+
+def load_engine(backend: str, model_name: str, threads: int = 0, compute_type: str = "int8") -> ASREngine:
+    """Instantiate a backend by name and log how long the model took to load."""
+    t0 = time.perf_counter()
+    backend = backend.lower()
+    if backend == "whisper":
+        engine = WhisperTorchEngine(model_name, threads)
+    elif backend in ("faster-whisper", "faster_whisper", "ctranslate2"):
+        engine = FasterWhisperEngine(model_name, threads, compute_type)
+    else:
+        raise ValueError(f"Unknown ASR backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    log.info("Loaded ASR engine %s in %.2fs", engine.name, time.perf_counter() - t0)
+    return engine
@@ -0,0 +1,465 @@
+"""
+async_bridge.py
+---------------
+asyncio implementation of the Unity bridge.
+
+Same wire protocol, environment variables and STT/LLM/TTS behaviour as
+client.py, but one event loop serves every Unity connection:
+
+    * asyncio.start_server instead of an accept loop plus a thread per
+      connection, so an idle Unity client costs a coroutine, not a thread;
+    * framed reads/writes on StreamReader/StreamWriter;
+    * async clients for the Rust server (fragment stream) and the Whisper
+      server (local IPC; the HTTP fallback runs on an executor thread);
+    * noise cancellation, VAD and resampling run in the default executor,
+      TTS/RVC stay on TTSPipeline's worker thread, and their completions
+      come back as futures instead of a blocking Event.wait;
+    * if Unity disconnects mid-turn the turn is cancelled: the Rust
+      connection is closed and sentences still queued for TTS are skipped.
+
+Usage
+-----
+    python async_bridge.py
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+import struct
+import threading
+import time
+
+import client as bridge
+from framing import TextFrames
+from segmenter import SentenceSegmenter
+from stt_ipc import AsyncIPCClient, IPCNotSent
+from unity_protocol import REQUEST_MAGIC, audio_frames, end_frame, text_frame
+
+log = bridge.log
+
+MAX_PAYLOAD = 5 * 1024 * 1024
+MAX_FRAME = 32 * 1024 * 1024
+RECV_CHUNK = 65536
+
+# Treat EOF from Unity while a turn is running as a disconnect and cancel the turn.
+# Turn off for clients that half-close their side after sending the request.
+ASYNC_CANCEL_ON_EOF = os.getenv("ASYNC_CANCEL_ON_EOF", "1").lower() in ("1", "true", "yes")
+
+_stt_aipc: AsyncIPCClient | None = None
+
+
+# ---------------------------------------------------------------------------
+# Framing
+# ---------------------------------------------------------------------------
+
+async def _read_payload(reader: asyncio.StreamReader, n: int, on_chunk=None) -> bytes:
+    """
+    Read exactly n bytes into one preallocated buffer. Each received piece is handed to
+    on_chunk on an executor thread, one at a time and in order, while the next piece is read.
+    """
+    loop = asyncio.get_running_loop()
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    handling = None
+    while got < n:
+        chunk = await reader.read(min(n - got, RECV_CHUNK))
+        if not chunk:
+            raise asyncio.IncompleteReadError(bytes(buf[:got]), n)
+        view[got:got + len(chunk)] = chunk
+        if on_chunk is not None:
+            if handling is not None:
+                await handling
+            handling = loop.run_in_executor(None, on_chunk, chunk)
+        got += len(chunk)
+    if handling is not None:
+        await handling
+    return bytes(buf)
+
+
+async def _send_response(writer: asyncio.StreamWriter, payload: dict):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.writelines((struct.pack("<I", len(body)), body, struct.pack("<I", 0)))
+    await writer.drain()
+
+
+class AsyncResponseWriter:
+    """Protocol v2 sender (see unity_protocol.py) on a StreamWriter."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.text_sent = False
+        self.sentences_sent = 0
+        self.first_frame_at: float | None = None
+
+    async def _send(self, parts):
+        self.writer.writelines(parts)
+        await self.writer.drain()
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
+
+    async def text(self, delta: str):
+        if delta:
+            await self._send(text_frame(delta))
+            self.text_sent = True
+
+    async def audio_file(self, path: str):
+        from pcm import read_pcm16
+        try:
+            pcm16, rate = await asyncio.get_running_loop().run_in_executor(None, read_pcm16, path)
+        except Exception as e:
+            log.warning("Could not read %s for streaming: %s", path, e)
+            return
+        await self._send(audio_frames(pcm16, rate, self.sentences_sent))
+        self.sentences_sent += 1
+
+    async def end(self, payload: dict):
+        if not self.text_sent:
+            await self.text(payload.get("text", ""))
+        if not self.sentences_sent and payload.get("audio"):
+            await self.audio_file(payload["audio"])
+        await self._send(end_frame(payload))
+
+
+# ---------------------------------------------------------------------------
+# Rust server
+# ---------------------------------------------------------------------------
+
+async def aiter_monika(question: str):
+    """Yield reply fragments from the Rust server as they arrive; raises on protocol errors."""
+    timeout = float(os.getenv("CLIENT_SOCKET_TIMEOUT_SECS", "310"))
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(bridge.SERVER_HOST, bridge.SERVER_PORT), timeout)
+    try:
+        body = question.encode("utf-8")
+        writer.writelines((struct.pack("<I", len(body)), body))
+        await writer.drain()
+        text = TextFrames()
+        while True:
+            (length,) = struct.unpack("<I", await asyncio.wait_for(reader.readexactly(4), timeout))
+            if length == 0:
+                tail = text.flush()
+                if tail:
+                    yield tail
+                return
+            if length > MAX_FRAME:
+                raise ValueError(f"Invalid frame length: {length}")
+            fragment = text.feed(await asyncio.wait_for(reader.readexactly(length), timeout))
+            if fragment:
+                yield fragment
+    finally:
+        writer.close()
+
+
+# ---------------------------------------------------------------------------
+# STT
+# ---------------------------------------------------------------------------
+
+async def _recognize_segment(segment, index: int, addr):
+    """Transcribe one VAD segment; returns its text, or None if the request failed."""
+    from noise_cancel import SAMPLE_RATE as NC_SAMPLE_RATE
+    from pcm import wav_bytes
+    from resample import resample
+
+    loop = asyncio.get_running_loop()
+    if not bridge.STT_RAW_PCM:
+        wav_io = io.BytesIO(wav_bytes(segment, NC_SAMPLE_RATE))
+        return await loop.run_in_executor(None, bridge._post_whisper, wav_io, addr, "unity_audio_%d.wav" % index)
+
+    samples = await loop.run_in_executor(None, resample, segment, NC_SAMPLE_RATE, bridge.WHISPER_RATE)
+    if _stt_aipc is not None:
+        try:
+            j = await _stt_aipc.recognize(samples, bridge.WHISPER_RATE, str(addr))
+        except IPCNotSent as e:
+            log.warning("STT IPC request failed for %s (%s); falling back to HTTP", addr, e)
+        except Exception as e:
+            # The server may be transcribing it already; asking again over HTTP would do it twice
+            log.error("Whisper recognition over IPC failed for %s: %r", addr, e)
+            return None
+        else:
+            if "error" in j:
+                log.error("Whisper recognition failed for %s: %s", addr, j["error"])
+                return None
+            return bridge._whisper_text(j, addr)
+    return await loop.run_in_executor(None, bridge._post_whisper_raw, samples, addr)
+
+
+async def recognize(raw: bytes, addr, cleaned=None) -> str:
+    loop = asyncio.get_running_loop()
+    speech_text, segments = await loop.run_in_executor(None, bridge._speech_segments, raw, addr, cleaned)
+    if speech_text or not segments:
+        return speech_text
+
+    if not bridge._stt_ready.is_set():
+        log.info("Whisper server still starting; holding request from %s until it is ready", addr)
+        await loop.run_in_executor(None, bridge._stt_ready.wait, bridge.STT_READY_TIMEOUT_SECS)
+
+    texts = []
+    for i, segment in enumerate(segments):
+        text = await _recognize_segment(segment, i, addr)
+        if text is None:
+            return ""
+        if text:
+            texts.append(text)
+
+    recognized = " ".join(texts)
+    log.info("Whisper recognition for %s returned: %r", addr, recognized)
+    return recognized
+
+
+# ---------------------------------------------------------------------------
+# LLM + TTS
+# ---------------------------------------------------------------------------
+
+def _speak(tts: bridge.TTSPipeline, text: str, cancelled: threading.Event) -> asyncio.Future:
+    """Queue `text` on the TTS thread; the returned future resolves to its WAV path ("" on failure)."""
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+
+    def _set(path):
+        if not fut.done():
+            fut.set_result(path or "")
+
+    def on_done(path):
+        try:
+            loop.call_soon_threadsafe(_set, path)
+        except RuntimeError:
+            pass  # loop already closed during shutdown
+
+    tts.speak(text, on_done, cancelled=cancelled)
+    return fut
+
+
+async def reply(question: str, tts: bridge.TTSPipeline | None, cancelled: threading.Event,
+                out: AsyncResponseWriter | None = None):
+    """
+    Stream the reply and voice it (sentence by sentence when TTS_STREAMING is on).
+    With a v2 `out`, text fragments and then each sentence's audio are sent as soon as they are ready.
+
+    Returns (answer, audio_path); answer is None if the Rust server was unreachable.
+    """
+    t0 = time.perf_counter()
+    streaming = bridge.TTS_STREAMING and tts is not None
+    segmenter = SentenceSegmenter()
+    parts: list[str] = []
+    pending: list[asyncio.Future] = []
+    first_audio = []
+
+    def on_audio(fut: asyncio.Future):
+        if fut.cancelled() or fut.exception():
+            return  # turn cancelled (barge-in or disconnect)
+        if fut.result() and not first_audio:
+            first_audio.append(fut)
+            log.info("[TTS] First audio ready after %.2fs", time.perf_counter() - t0)
+
+    def _voice(text: str):
+        log.info("[TTS] Queueing sentence %d: %s", len(pending) + 1, text[:60])
+        fut = _speak(tts, text, cancelled)
+        fut.add_done_callback(on_audio)
+        pending.append(fut)
+
+    try:
+        async for fragment in aiter_monika(question):
+            if not parts:
+                log.info("[LLM] First token after %.2fs", time.perf_counter() - t0)
+            parts.append(fragment)
+            if out is not None:
+                await out.text(fragment)
+            if streaming:
+                for clause in segmenter.feed(fragment):
+                    _voice(clause)
+    except Exception as e:
+        log.error("ask_monika error: %s", e)
+        if not parts:
+            return None, ""
+
+    answer = "".join(parts)
+    log.info("AI replied in %.2fs: %s", time.perf_counter() - t0, answer[:80])
+    if streaming:
+        for clause in segmenter.flush():
+            _voice(clause)
+    elif tts is not None:
+        _voice(answer)
+    return answer, await _collect(pending, tts, out)
+
+
+async def _collect(pending: list[asyncio.Future], tts: bridge.TTSPipeline | None,
+                   out: AsyncResponseWriter | None) -> str:
+    """Wait for the sentences' WAVs (sending each to a v2 `out`) and merge them; returns the reply's path."""
+    if not pending:
+        return ""
+    deadline = time.monotonic() + bridge.TTS_TIMEOUT_SECS
+    paths = []
+    for fut in pending:
+        # In order, so each sentence can go out to a v2 client as soon as it and those before it are done
+        done, _ = await asyncio.wait((fut,), timeout=max(0.0, deadline - time.monotonic()))
+        if fut in done and not fut.cancelled() and fut.result():
+            paths.append(fut.result())
+            if out is not None:
+                await out.audio_file(paths[-1])
+    return await asyncio.get_running_loop().run_in_executor(None, tts.merge, paths)
+
+
+async def _turn(raw: bytes, addr, cleaned, tts, cancelled: threading.Event, out: AsyncResponseWriter | None):
+    speech_text = await recognize(raw, addr, cleaned)
+    if not speech_text:
+        log.warning("No speech text extracted from Unity audio payload %s", addr)
+        return "", ""
+    log.info("Player said: %s", speech_text)
+    if tts is not None:
+        tts.barge_in()
+
+    hit = bridge.cached_reply(speech_text, tts)
+    if hit is not None:
+        answer, audio = hit
+        if audio or tts is None:
+            return hit
+        # The cached clip was cleaned up; voice the text again (the TTS cache makes this cheap)
+        audio = await _collect([_speak(tts, answer, cancelled)], tts, out)
+    else:
+        answer, audio = await reply(speech_text, tts, cancelled, out)
+        if answer is None:
+            log.warning("Server not available, sending recognized speech text instead")
+            return speech_text, ""
+    bridge.remember_reply(speech_text, answer, audio, tts is not None)
+    return answer, audio
+
+
+# ---------------------------------------------------------------------------
+# Unity connections
+# ---------------------------------------------------------------------------
+
+async def _finish_unless_disconnected(task: asyncio.Task, reader: asyncio.StreamReader) -> bool:
+    """Wait for `task`; if Unity hangs up first, cancel it and return False."""
+    if not ASYNC_CANCEL_ON_EOF:
+        await task
+        return True
+    while True:
+        watch = asyncio.ensure_future(reader.read(1))
+        done, _ = await asyncio.wait({task, watch}, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            watch.cancel()
+            task.result()
+            return True
+        try:
+            data = watch.result()
+        except Exception:
+            data = b""
+        if data:
+            continue  # stray byte after the request; not a disconnect
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        return False
+
+
+async def handle_unity(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, tts):
+    addr = writer.get_extra_info("peername")
+    bridge.note_unity_connected(addr)
+    cancelled = threading.Event()
+    t0 = time.perf_counter()
+    try:
+        (length,) = struct.unpack("<I", await reader.readexactly(4))
+        out = None
+        if length == REQUEST_MAGIC:
+            out = AsyncResponseWriter(writer)
+            (length,) = struct.unpack("<I", await reader.readexactly(4))
+        log.info("Received frame header from %s: length=%d, protocol v%d", addr, length, 1 if out is None else 2)
+        if length == 0 or length > MAX_PAYLOAD:
+            log.warning("Invalid speech length from %s: %d (max %d)", addr, length, MAX_PAYLOAD)
+            return
+
+        cleaner = None
+        if bridge.NOISE_STREAMING:
+            from noise_cancel import PayloadCleaner
+            cleaner = PayloadCleaner()
+        raw = await _read_payload(reader, length, cleaner.feed if cleaner else None)
+        log.info("Unity audio packet received from %s (bytes=%d)", addr, len(raw))
+        cleaned = await asyncio.get_running_loop().run_in_executor(None, cleaner.result) if cleaner else None
+
+        task = asyncio.ensure_future(_turn(raw, addr, cleaned, tts, cancelled, out))
+        if not await _finish_unless_disconnected(task, reader):
+            log.warning("Unity %s disconnected mid-turn; cancelled after %.2fs", addr, time.perf_counter() - t0)
+            return
+
+        answer, audio = task.result()
+        try:
+            if out is None:
+                await _send_response(writer, {"text": answer, "audio": audio})
+            else:
+                await out.end({"text": answer, "audio": audio})
+        finally:
+            if tts is not None and audio:
+                tts.artifacts.release(audio)
+        done = time.perf_counter()
+        log.info("Response sent to %s (audio=%s) after %.2fs", addr, "yes" if audio else "no", done - t0)
+        first_frame = out.first_frame_at if out is not None and out.first_frame_at else done
+        log.info("[latency] %s: time to first frame to Unity %.2fs", addr, first_frame - t0)
+    except asyncio.IncompleteReadError:
+        log.warning("Connection from %s closed while reading the request", addr)
+    except (ConnectionError, OSError) as e:
+        log.warning("Connection to %s failed: %s", addr, e)
+    except Exception as e:
+        log.error("Connection handler error: %s", e)
+    finally:
+        # Anything of this turn still queued for TTS is no longer wanted
+        cancelled.set()
+        writer.close()
+        with contextlib.suppress(Exception):
+            await writer.wait_closed()
+
+
+async def amain():
+    global _stt_aipc
+    log.info("=" * 50)
+    log.info("Monika Unity Bridge (asyncio)")
+    log.info("=" * 50)
+    log.info("Listening for Unity on %s:%d", bridge.UNITY_HOST, bridge.UNITY_PORT)
+    log.info("Monika AI server at  %s:%d", bridge.SERVER_HOST, bridge.SERVER_PORT)
+
+    tts = None
+    server = await asyncio.start_server(lambda r, w: handle_unity(r, w, tts), bridge.UNITY_HOST, bridge.UNITY_PORT)
+    log.info("[startup] Listener accepting after %.0f ms", (time.perf_counter() - bridge._BOOT_T0) * 1000)
+
+    whisper_proc = bridge.start_whisper_server()
+    bridge._startup_expected.add("whisper")
+    threading.Thread(target=bridge.wait_for_whisper, args=(whisper_proc,), name="stt-ready", daemon=True).start()
+    if bridge._stt_ipc is not None:
+        _stt_aipc = AsyncIPCClient(bridge._stt_ipc.address)
+
+    tts = bridge.start_tts()
+    threading.Thread(target=bridge._preload, args=(bridge.PRELOAD_MODULES,), name="preload", daemon=True).start()
+    log.info("Waiting for Unity connections...")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in ("SIGINT", "SIGTERM"):
+        with contextlib.suppress(NotImplementedError, AttributeError):
+            loop.add_signal_handler(getattr(signal, sig), stop.set)
+
+    try:
+        async with server:
+            await stop.wait()
+        log.info("Received termination signal, shutting down...")
+    finally:
+        log.info("Closing Unity server socket")
+        server.close()
+        if _stt_aipc is not None:
+            await _stt_aipc.close()
+        if tts:
+            tts.shutdown()
+        bridge.stop_whisper_server(whisper_proc)
+
+
+def main():
+    try:
+        asyncio.run(amain())
+    except KeyboardInterrupt:
+        log.info("Keyboard interrupt received, shut down")
+
+
+if __name__ == "__main__":
+    main()
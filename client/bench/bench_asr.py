@@ -0,0 +1,105 @@
+"""
+bench_asr.py
+------------
+Run the same WAV corpus through each ASR backend and report real-time
+factor and memory.
+
+Each backend runs in its own subprocess so load time and peak RSS are
+measured in isolation.  RTF is total transcription wall time divided by
+total audio duration (lower is better; < 1 is faster than real time).
+
+Usage
+-----
+    python bench/bench_asr.py corpus_dir_or.wav [...] \
+        [--engines whisper:small,faster-whisper:small:int8] [--threads 4] [--batch 1]
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+_client_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _client_dir)
+from pcm import read_wav  # noqa: E402
+from resample import resample  # noqa: E402
+from asr_engines import SAMPLE_RATE, load_engine  # noqa: E402
+
+
+def _peak_rss_mb() -> float:
+    if os.name == "nt":
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2**20
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _corpus(paths: list[str]) -> list[str]:
+    files = []
+    for p in paths:
+        files += sorted(glob.glob(os.path.join(p, "*.wav"))) if os.path.isdir(p) else [p]
+    return files
+
+
+def _worker(spec: str, files: list[str], threads: int, batch: int) -> dict:
+    backend, model_name, *rest = spec.split(":")
+    clips = []
+    for f in files:
+        samples, rate = read_wav(f)
+        clips.append(resample(samples, rate, SAMPLE_RATE))
+    audio_secs = sum(len(c) for c in clips) / SAMPLE_RATE
+
+    t0 = time.perf_counter()
+    engine = load_engine(backend, model_name, threads, rest[0] if rest else "int8")
+    load_secs = time.perf_counter() - t0
+
+    engine.transcribe_batch(clips[:1])  # warm-up
+    t0 = time.perf_counter()
+    for i in range(0, len(clips), batch):
+        engine.transcribe_batch(clips[i:i + batch])
+    wall = time.perf_counter() - t0
+
+    return {"engine": engine.name, "load_s": load_secs, "audio_s": audio_secs,
+            "wall_s": wall, "rtf": wall / audio_secs if audio_secs else 0.0, "peak_rss_mb": _peak_rss_mb()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("corpus", nargs="+", help="WAV files and/or directories of WAV files")
+    ap.add_argument("--engines", default="whisper:small,faster-whisper:small:int8",
+                    help="comma-separated backend:model[:compute_type] specs")
+    ap.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = runtime default)")
+    ap.add_argument("--batch", type=int, default=1, help="clips per transcribe_batch call")
+    ap.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    files = _corpus(args.corpus)
+    if args.worker:
+        print(json.dumps(_worker(args.worker, files, args.threads, args.batch)))
+        return
+    if not files:
+        sys.exit("No WAV files found")
+
+    rows = []
+    for spec in args.engines.split(","):
+        cmd = [sys.executable, os.path.abspath(__file__), *files, "--worker", spec,
+               "--threads", str(args.threads), "--batch", str(args.batch)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{spec}: failed\n{proc.stderr.strip()[-2000:]}", file=sys.stderr)
+            continue
+        rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{len(files)} file(s), threads={args.threads or 'default'}, batch={args.batch}")
+    print(f"  {'engine':<34} {'load s':>8} {'audio s':>8} {'wall s':>8} {'RTF':>7} {'peak MB':>9}")
+    for r in rows:
+        print(f"  {r['engine']:<34} {r['load_s']:>8.2f} {r['audio_s']:>8.1f} {r['wall_s']:>8.2f} "
+              f"{r['rtf']:>7.3f} {r['peak_rss_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
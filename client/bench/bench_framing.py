@@ -0,0 +1,109 @@
+"""
+bench_framing.py
+----------------
+Throughput of the bridge's length-prefixed framing at different payload
+sizes, old ad-hoc codec versus framing.py.
+
+    old : header and body as two sendall() calls; receive by `buf += chunk`
+    new : one vectored sendmsg() per frame; recv_into a preallocated buffer
+
+A sender thread streams frames over a socket pair (AF_UNIX by default,
+loopback TCP with --tcp) and the receiver reports MB/s and frames/s.
+
+Usage
+-----
+    python bench/bench_framing.py [--sizes 64,4096,65536,1048576,5242880] [--total-mb 64] [--tcp]
+"""
+
+import argparse
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from framing import recv_frame, send_frames  # noqa: E402
+
+
+def _old_send(sock, body):
+    sock.sendall(struct.pack("<I", len(body)))
+    sock.sendall(body)
+
+
+def _old_recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return buf
+
+
+def _old_recv(sock, limit):
+    (length,) = struct.unpack("<I", _old_recv_exact(sock, 4))
+    return _old_recv_exact(sock, length) if length else b""
+
+
+CODECS = {
+    "old": (_old_send, _old_recv),
+    "new": (send_frames, recv_frame),
+}
+
+
+def _pair(tcp: bool):
+    if not tcp:
+        return socket.socketpair()
+    srv = socket.create_server(("127.0.0.1", 0))
+    a = socket.create_connection(srv.getsockname())
+    b, _ = srv.accept()
+    srv.close()
+    for s in (a, b):
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return a, b
+
+
+def _run(codec: str, size: int, frames: int, tcp: bool) -> float:
+    send, recv = CODECS[codec]
+    a, b = _pair(tcp)
+    body = os.urandom(size)
+
+    def sender():
+        for _ in range(frames):
+            send(a, body)
+
+    t = threading.Thread(target=sender, daemon=True)
+    t0 = time.perf_counter()
+    t.start()
+    for _ in range(frames):
+        recv(b, size)
+    wall = time.perf_counter() - t0
+    t.join()
+    a.close()
+    b.close()
+    return wall
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="64,4096,65536,1048576,5242880")
+    ap.add_argument("--total-mb", type=float, default=64, help="bytes moved per size and codec")
+    ap.add_argument("--tcp", action="store_true", help="loopback TCP instead of a Unix socket pair")
+    args = ap.parse_args()
+
+    print(f"{'AF_INET loopback' if args.tcp else 'socketpair'}, ~{args.total_mb:g} MB per row")
+    print(f"  {'size':>9} {'codec':>5} {'frames':>7} {'MB/s':>9} {'frames/s':>10} {'speed-up':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        frames = max(8, min(200_000, int(args.total_mb * 2**20 // size)))
+        base = None
+        for codec in ("old", "new"):
+            wall = _run(codec, size, frames, args.tcp)
+            base = base or wall
+            print(f"  {size:>9} {codec:>5} {frames:>7} {size * frames / wall / 2**20:>9.1f} "
+                  f"{frames / wall:>10.0f} {base / wall:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+bench_noise_cancel.py
+---------------------
+Per-second-of-audio cost of the noise-cancellation stage at 48 kHz.
+
+Reports, for several utterance lengths, the time spent in spectral
+subtraction alone and in the full `process_audio` call (PCM decode,
+spectral subtraction, adaptive gain, WAV encode), normalised to
+milliseconds per second of input audio.
+
+Usage
+-----
+    python bench/bench_noise_cancel.py [--runs 10] [--lengths 1,5,15,30]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import noise_cancel  # noqa: E402
+from noise_cancel import SAMPLE_RATE, _spectral_subtract, _float32_to_bytes, process_audio  # noqa: E402
+
+
+def _noisy_speech(seconds: float, rng: np.random.Generator) -> np.ndarray:
+    n = int(SAMPLE_RATE * seconds)
+    t = np.arange(n) / SAMPLE_RATE
+    voice = 0.3 * np.sin(2 * np.pi * 180 * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+    voice[: SAMPLE_RATE // 4] = 0.0      # leading silence for the noise estimate
+    return (voice + 0.02 * rng.standard_normal(n)).astype(np.float32)
+
+
+def _best_ms(fn, runs: int) -> float:
+    fn()  # warm-up
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--lengths", default="1,5,15,30", help="utterance lengths in seconds")
+    args = ap.parse_args()
+
+    noise_cancel.log.disabled = True
+    rng = np.random.default_rng(0)
+
+    print(f"{SAMPLE_RATE} Hz, best of {args.runs} runs")
+    print(f"  {'seconds':>8} {'subtract ms':>12} {'ms/s':>8} {'process ms':>12} {'ms/s':>8}")
+    for seconds in (float(s) for s in args.lengths.split(",")):
+        signal = _noisy_speech(seconds, rng)
+        raw = _float32_to_bytes(signal)
+        sub = _best_ms(lambda: _spectral_subtract(signal), args.runs)
+        full = _best_ms(lambda: process_audio(raw), args.runs)
+        print(f"  {seconds:>8.1f} {sub:>12.2f} {sub / seconds:>8.2f} {full:>12.2f} {full / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
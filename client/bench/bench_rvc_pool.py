@@ -0,0 +1,100 @@
+"""
+bench_rvc_pool.py
+-----------------
+Wall time to voice a 5-sentence reply, in-process RVCEngine versus
+RVCPool at different worker counts.
+
+in-process : one resident RVCEngine converts the sentences one after another
+pool N     : RVCPool with N worker processes; all sentences are submitted at
+             once and collected in order, as TTSPipeline does
+
+Base speech comes from synthetic_speech.py, one clip per sentence with
+the lengths given by --seconds, so pyttsx3 is not needed.
+Model loading is excluded: every configuration is warmed up before it is
+timed.  Threads per worker default to cores / workers (the bridge's
+default); pass --threads to pin them instead.
+
+Usage
+-----
+    python bench/bench_rvc_pool.py --model teto.pth [--workers 1,2,4] [--threads 0]
+                                   [--seconds 2.5,1.2,3.0,0.8,2.0] [--runs 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+_client_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_repo_dir = os.path.dirname(_client_dir)
+for _d in (os.path.join(_repo_dir, "src", "rvc"), os.path.join(_repo_dir, "src", "rvc-tts-pipe"), _client_dir):
+    if _d not in sys.path:
+        sys.path.insert(0, _d)
+from rvc_pool import RVCPool  # noqa: E402
+from synthetic_speech import BASE_RATE, base_speech  # noqa: E402
+
+OUT_RATE = 48_000
+
+
+def _in_process(engine, clips):
+    from resample import resample
+    for clip in clips:
+        samples, rate = engine.convert(clip, BASE_RATE)
+        resample(samples, rate, OUT_RATE)
+
+
+def _pooled(pool, clips):
+    futures = [pool.submit(clip, BASE_RATE, OUT_RATE) for clip in clips]
+    for fut in futures:
+        fut.result()
+
+
+def _time(fn, runs: int) -> list[float]:
+    fn()  # warm-up
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", required=True, help="RVC .pth checkpoint")
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--threads", type=int, default=0, help="torch threads per worker (0 = cores / workers)")
+    ap.add_argument("--seconds", default="2.5,1.2,3.0,0.8,2.0", help="length of each sentence")
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    model = os.path.abspath(args.model)
+    clips = [base_speech(float(s)) for s in args.seconds.split(",")]
+    rows = []
+
+    from voice_engine import RVCEngine
+    engine = RVCEngine(model, work_dir=_client_dir)
+    engine.load()
+    rows.append(("in-process", "-", _time(lambda: _in_process(engine, clips), args.runs)))
+    del engine
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        pool = RVCPool(model, workers, args.threads, work_dir=_client_dir)
+        try:
+            pool.warm()
+            rows.append((f"pool {workers}", str(pool.threads), _time(lambda: _pooled(pool, clips), args.runs)))
+        finally:
+            pool.close()
+
+    speech = sum(len(c) for c in clips) / BASE_RATE
+    print(f"{len(clips)} sentences, {speech:.1f}s of speech, {args.runs} runs, {os.cpu_count()} cores")
+    print(f"  {'backend':<11} {'threads':>7} {'mean s':>8} {'min s':>8} {'x realtime':>10} {'speed-up':>9}")
+    base = np.mean(rows[0][2])
+    for name, threads, secs in rows:
+        mean = np.mean(secs)
+        print(f"  {name:<11} {threads:>7} {mean:>8.2f} {np.min(secs):>8.2f} {speech / mean:>10.2f} {base / mean:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+bench_stt_concurrency.py
+------------------------
+Throughput of a running Whisper server under concurrent talkers.
+
+Posts the same WAV `--requests` times from `--concurrency` client threads
+to /recognize and reports requests/second plus latency percentiles.
+Run it once against a server started with STT_BATCHING=0 and once with
+batching on to compare.
+
+Usage
+-----
+    python bench/bench_stt_concurrency.py clip.wav [--concurrency 1,4,8] [--requests 32]
+                                                   [--url http://127.0.0.1:5001/recognize]
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+
+def _one(url: str, wav: bytes) -> float:
+    t0 = time.perf_counter()
+    r = requests.post(url, files={"audio": ("bench.wav", wav, "audio/wav")}, timeout=120)
+    r.raise_for_status()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("wav")
+    ap.add_argument("--url", default="http://127.0.0.1:5001/recognize")
+    ap.add_argument("--concurrency", default="1,4,8")
+    ap.add_argument("--requests", type=int, default=32)
+    args = ap.parse_args()
+
+    with open(args.wav, "rb") as f:
+        wav = f.read()
+    _one(args.url, wav)  # warm-up
+
+    print(f"{args.requests} requests per level against {args.url}")
+    print(f"  {'conc':>5} {'req/s':>8} {'p50 s':>8} {'p95 s':>8}")
+    for conc in (int(c) for c in args.concurrency.split(",")):
+        with ThreadPoolExecutor(max_workers=conc) as pool:
+            t0 = time.perf_counter()
+            lat = list(pool.map(lambda _: _one(args.url, wav), range(args.requests)))
+            wall = time.perf_counter() - t0
+        print(f"  {conc:>5} {args.requests / wall:>8.2f} {np.percentile(lat, 50):>8.2f} {np.percentile(lat, 95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
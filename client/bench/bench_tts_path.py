@@ -0,0 +1,121 @@
+"""
+bench_tts_path.py
+-----------------
+Compare the file-based TTS post-processing path against the in-memory one.
+
+file   : base WAV -> RVC reads file, writes file -> pydub from_wav ->
+         set_frame_rate -> export to target -> remove temp files
+memory : base WAV read once -> RVC array -> polyphase resample -> one final
+         write (or no write at all with --no-write, as when audio is streamed)
+
+Both paths start from a base WAV on disk, because pyttsx3 can only render
+to a file.  Base speech comes from synthetic_speech.py, so pyttsx3 is not
+needed.  Without --model the RVC step is an identity conversion, which
+isolates the I/O and container overhead; with --model the real voice
+model is used for both paths (rvc_convert vs. the resident RVCEngine).
+
+Usage
+-----
+    python bench/bench_tts_path.py [--seconds 3] [--runs 10] [--model teto.pth] [--no-write]
+"""
+
+import argparse
+import os
+import sys
+import shutil
+import tempfile
+import time
+import numpy as np
+
+_client_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_repo_dir = os.path.dirname(_client_dir)
+for _d in (os.path.join(_repo_dir, "src", "rvc"), os.path.join(_repo_dir, "src", "rvc-tts-pipe"), _client_dir):
+    if _d not in sys.path:
+        sys.path.insert(0, _d)
+from pcm import read_wav, write_wav  # noqa: E402
+from resample import resample  # noqa: E402
+from synthetic_speech import BASE_RATE, base_speech  # noqa: E402
+
+OUT_RATE = 48_000
+
+
+def _file_path(base: np.ndarray, work: str, model: str | None):
+    from pydub import AudioSegment
+
+    fd, tmp_wav = tempfile.mkstemp(suffix=".wav", dir=work)
+    os.close(fd)
+    write_wav(tmp_wav, base, BASE_RATE)
+
+    if model:
+        from rvc_infer import rvc_convert
+        out_path = rvc_convert(model_path=model, input_path=tmp_wav)
+    else:
+        samples, rate = read_wav(tmp_wav)
+        out_path = tmp_wav[:-4] + "_rvc.wav"
+        write_wav(out_path, samples, rate)
+
+    target = os.path.join(work, "target_file.wav")
+    audio = AudioSegment.from_wav(out_path)
+    audio = audio.set_frame_rate(OUT_RATE)
+    audio.export(target, format="wav")
+    os.remove(out_path)
+    os.remove(tmp_wav)
+
+
+def _memory_path(base: np.ndarray, work: str, engine, write: bool):
+    fd, tmp_wav = tempfile.mkstemp(suffix=".wav", dir=work)
+    os.close(fd)
+    write_wav(tmp_wav, base, BASE_RATE)
+    samples, rate = read_wav(tmp_wav)
+    os.remove(tmp_wav)
+
+    if engine is not None:
+        samples, rate = engine.convert(samples, rate)
+
+    samples = resample(samples, rate, OUT_RATE)
+    if write:
+        write_wav(os.path.join(work, "target_memory.wav"), samples, OUT_RATE)
+
+
+def _time(fn, runs: int) -> list[float]:
+    fn()  # warm-up
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=3.0, help="length of each synthetic utterance")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--model", default=None, help="RVC .pth checkpoint (identity conversion if omitted)")
+    ap.add_argument("--no-write", action="store_true", help="memory path skips the final write")
+    args = ap.parse_args()
+
+    base = base_speech(args.seconds)
+    engine = None
+    if args.model:
+        from voice_engine import RVCEngine
+        engine = RVCEngine(os.path.abspath(args.model))
+        engine.load()
+
+    work = tempfile.mkdtemp(prefix="bench_tts_")
+    try:
+        rows = [
+            ("file", _time(lambda: _file_path(base, work, args.model), args.runs)),
+            ("memory", _time(lambda: _memory_path(base, work, engine, not args.no_write), args.runs)),
+        ]
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(f"{args.seconds:.1f}s utterance, {args.runs} runs, rvc={'model' if args.model else 'identity'}")
+    print(f"  {'path':<8} {'mean ms':>10} {'p50 ms':>10} {'min ms':>10}")
+    for name, ms in rows:
+        print(f"  {name:<8} {np.mean(ms):>10.2f} {np.median(ms):>10.2f} {np.min(ms):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
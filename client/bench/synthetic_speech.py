@@ -0,0 +1,26 @@
+"""
+synthetic_speech.py
+-------------------
+Stand-in for pyttsx3 output, shared by the TTS benchmarks.
+
+A voiced-like harmonic tone: a ~180 Hz fundamental with a slow vibrato
+and six overtones at falling amplitude, at pyttsx3's 22.05 kHz.  Close
+enough to speech for RVC and resampling costs, with no TTS engine needed.
+
+Public API
+----------
+    BASE_RATE
+    base_speech(seconds) -> float32 samples at BASE_RATE
+"""
+
+import numpy as np
+
+BASE_RATE = 22_050
+
+
+def base_speech(seconds: float) -> np.ndarray:
+    t = np.arange(int(BASE_RATE * seconds)) / BASE_RATE
+    f0 = 180 + 20 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / BASE_RATE
+    wave = sum(np.sin(k * phase) / k for k in range(1, 8))
+    return (0.2 * wave).astype(np.float32)
@@ -15,9 +15,27 @@ import logging
 import io
 import subprocess
 import signal
-import requests
-from noise_cancel import process_audio
-from playsound import playsound
+import argparse
+import importlib
+import importlib.util
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING
+from segmenter import SentenceSegmenter
+from framing import TextFrames, recv_exact, recv_frame, send_frames
+from pipeline import Job, StagedPipeline
+from server_mux import MuxPool, MuxUnsupported
+from reply_cache import ReplyCache
+from unity_protocol import REQUEST_MAGIC, ResponseWriter
+from artifact_store import ArtifactStore
+# NumPy-backed helpers, requests, pyttsx3, sounddevice and rvc_infer (torch/fairseq) are imported
+# where they are first used, or preloaded in the background once the listener is up
+if TYPE_CHECKING:
+    from stt_ipc import IPCClient
+    from tts_cache import AudioCache
+    from player import AudioPlayer
+    from rvc_pool import RVCPool
+    from voice_engine import RVCEngine
 warnings.filterwarnings("ignore")
 for _logger_name in ("comtypes", "comtypes.client._code_cache", "fairseq",
                       "fairseq.tasks", "torch", "numba"):
@@ -35,12 +53,6 @@ _rvc_dir = str(Path(__file__).resolve().parent.parent / "src" / "rvc")
 for _d in (_rvc_pipe_dir, _rvc_dir):
     if _d not in sys.path:
         sys.path.insert(0, _d)
-from rvc_infer import rvc_convert
-
-try:
-    import pyttsx3
-except ImportError:
-    pyttsx3 = None
 
 dotenv.load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
@@ -58,6 +70,90 @@ STREAMING_ASSETS_PATH = os.getenv("UNITY_STREAMING_ASSETS_PATH", os.path.join(CL
 VOICE_OUTPUT_PATH = os.path.join(STREAMING_ASSETS_PATH, "monika_response.wav").replace("\\", "/")
 log.info("Voice output path: %s", VOICE_OUTPUT_PATH)
 
+# Keep the RVC checkpoint, HuBERT and pitch extractor loaded instead of reloading them per utterance
+RVC_RESIDENT = os.getenv("RVC_RESIDENT", "1").lower() in ("1", "true", "yes")
+
+# "memory" keeps base, converted and resampled speech as NumPy buffers (needs the resident RVC engine);
+# "file" is the original temp-file + rvc_convert + pydub round trip
+TTS_AUDIO_PATH = os.getenv("TTS_AUDIO_PATH", "memory").lower()
+TTS_OUTPUT_RATE = 48000
+
+# Convert sentences in this many worker processes, each with its own resident model (0 = in-process).
+# Threads per worker default to cores / workers. Only used with the "memory" audio path.
+RVC_POOL_WORKERS = int(os.getenv("RVC_POOL_WORKERS", "0"))
+RVC_POOL_THREADS = int(os.getenv("RVC_POOL_THREADS", "0"))
+
+# Run noise cancellation on the Unity payload while it is still arriving
+NOISE_STREAMING = os.getenv("NOISE_STREAMING", "1").lower() in ("1", "true", "yes")
+
+# Largest reply fragment accepted from the Rust server
+MAX_REPLY_FRAME = 32 * 1024 * 1024
+
+WHISPER_URL = os.getenv("WHISPER_URL", "http://127.0.0.1:5001")
+WHISPER_RATE = 16000
+# Send float32 samples to /recognize_raw instead of a multipart WAV to /recognize
+STT_RAW_PCM = os.getenv("STT_RAW_PCM", "1").lower() in ("1", "true", "yes")
+
+# Talk to a Whisper server we spawned ourselves over local IPC instead of HTTP
+STT_IPC = os.getenv("STT_IPC", "1").lower() in ("1", "true", "yes")
+_stt_ipc: "IPCClient | None" = None
+
+# Trim non-speech before Whisper and skip it entirely for silent captures
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1").lower() in ("1", "true", "yes")
+
+# Voice each sentence as soon as the LLM finishes it instead of waiting for the full reply
+TTS_STREAMING = os.getenv("TTS_STREAMING", "1").lower() in ("1", "true", "yes")
+TTS_TIMEOUT_SECS = float(os.getenv("TTS_TIMEOUT_SECS", "120"))
+
+# Reply WAVs in StreamingAssets: oldest-first eviction past either limit, skipping files a response
+# still references (for at most ARTIFACT_LEASE_SECS)
+ARTIFACT_MAX_FILES = int(os.getenv("ARTIFACT_MAX_FILES", "256"))
+ARTIFACT_MAX_MB = float(os.getenv("ARTIFACT_MAX_MB", "256"))
+ARTIFACT_LEASE_SECS = float(os.getenv("ARTIFACT_LEASE_SECS", "300"))
+
+# Where the bridge itself plays replies: "device", "null", "file:<path>" (see player.py) or "off"
+TTS_PLAYBACK_SINK = os.getenv("TTS_PLAYBACK_SINK", "device")
+
+# Reuse synthesized clips for text that has been voiced before (same model, voice and rate)
+TTS_CACHE = os.getenv("TTS_CACHE", "1").lower() in ("1", "true", "yes")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(CLIENT_DIR, "cache", "tts"))
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "64"))
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "512"))
+
+# Keep a few warm, multiplexed connections to the Rust server instead of one per question.
+# The session id is what the server keys mood/session state on, so it must not change per turn.
+SERVER_MUX = os.getenv("SERVER_MUX", "1").lower() in ("1", "true", "yes")
+SERVER_POOL_SIZE = int(os.getenv("SERVER_POOL_SIZE", "2"))
+SERVER_SESSION_ID = os.getenv("SERVER_SESSION_ID") or f"unity-bridge@{socket.gethostname()}"
+_server_pool: MuxPool | None = None
+
+# Replay the previous reply (text and audio) when the player repeats a question.
+# The server does not report its mood to the bridge, so entries are keyed on the question alone
+# and the TTL bounds how stale a replayed mood can get. BYPASS answers fresh but keeps entries current.
+REPLY_CACHE = os.getenv("REPLY_CACHE", "0").lower() in ("1", "true", "yes")
+REPLY_CACHE_TTL_SECS = float(os.getenv("REPLY_CACHE_TTL_SECS", "600"))
+REPLY_CACHE_MAX_ENTRIES = int(os.getenv("REPLY_CACHE_MAX_ENTRIES", "256"))
+REPLY_CACHE_BYPASS = os.getenv("REPLY_CACHE_BYPASS", "0").lower() in ("1", "true", "yes")
+_reply_cache = ReplyCache(REPLY_CACHE_TTL_SECS, REPLY_CACHE_MAX_ENTRIES) if REPLY_CACHE else None
+
+# Staged scheduler: per-stage queue depth, workers, and how long a new turn may wait
+# for room at the entry queue before it is shed with a "busy" reply
+PIPELINE_QUEUE_DEPTH = int(os.getenv("PIPELINE_QUEUE_DEPTH", "4"))
+PIPELINE_ADMIT_TIMEOUT_SECS = float(os.getenv("PIPELINE_ADMIT_TIMEOUT_SECS", "0"))
+PIPELINE_STT_WORKERS = int(os.getenv("PIPELINE_STT_WORKERS", "2"))
+PIPELINE_LLM_WORKERS = int(os.getenv("PIPELINE_LLM_WORKERS", "2"))
+PIPELINE_TTS_WORKERS = int(os.getenv("PIPELINE_TTS_WORKERS", "1"))
+PIPELINE_RESPOND_WORKERS = int(os.getenv("PIPELINE_RESPOND_WORKERS", "2"))
+
+# How long to wait for the Whisper server's /health before giving up on gating requests
+STT_READY_TIMEOUT_SECS = float(os.getenv("STT_READY_TIMEOUT_SECS", "180"))
+_stt_ready = threading.Event()
+
+_BOOT_T0 = time.perf_counter()
+_startup_times: dict[str, float] = {}
+_startup_expected: set[str] = set()
+_startup_lock = threading.Lock()
+
 UNITY_CONNECTED = False
 UNITY_CONNECTED_LOCK = threading.Lock()
 
@@ -68,23 +164,90 @@ def start_whisper_server():
         log.warning("Whisper server script not found at %s. Skipping Whisper startup.", whisper_path)
         return None
 
+    global _stt_ipc
+    env = os.environ.copy()
+    ipc_address = None
+    if STT_IPC:
+        from stt_ipc import default_address as default_ipc_address
+        ipc_address = os.getenv("STT_IPC_ADDRESS") or default_ipc_address()
+        env["STT_IPC_ADDRESS"] = ipc_address
+
     log.info("Starting Whisper server from %s", whisper_path)
     try:
         proc = subprocess.Popen(
             [sys.executable, whisper_path],
             cwd=CLIENT_DIR,
+            env=env,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if hasattr(subprocess, "CREATE_NEW_PROCESS_GROUP") else 0,
         )
         log.info("Whisper server started (pid=%s)", proc.pid)
+        if ipc_address:
+            from stt_ipc import IPCClient
+            _stt_ipc = IPCClient(ipc_address)
+            log.info("Whisper requests will use local IPC at %s", ipc_address)
         return proc
     except Exception as e:
         log.error("Failed to start Whisper server: %s", e)
         return None
 
 
+def _record_startup(component: str, secs: float):
+    """Log one component's load + warm-up time, and a summary once every expected component has reported."""
+    log.info("[startup] %s ready in %.2fs (%.2fs since bridge start)",
+             component, secs, time.perf_counter() - _BOOT_T0)
+    with _startup_lock:
+        _startup_times[component] = secs
+        if not _startup_expected or not _startup_expected.issubset(_startup_times):
+            return
+        summary = ", ".join(f"{k}={v:.2f}s" for k, v in sorted(_startup_times.items(), key=lambda kv: -kv[1]))
+    log.info("[startup] All components ready after %.2fs: %s", time.perf_counter() - _BOOT_T0, summary)
+
+
+def wait_for_whisper(proc, timeout: float = STT_READY_TIMEOUT_SECS) -> bool:
+    """
+    Poll the Whisper server's /health with exponential backoff until it reports ready.
+
+    Sets `_stt_ready` on every exit path so requests stop waiting even if the
+    server never comes up (they then fail the same way they always did).
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + timeout
+    delay = 0.1
+    try:
+        import requests
+
+        while time.perf_counter() < deadline:
+            if proc is not None and proc.poll() is not None:
+                log.error("Whisper server exited during startup (code=%s)", proc.returncode)
+                return False
+            try:
+                r = requests.get(WHISPER_URL.rstrip("/") + "/health", timeout=2)
+                if r.status_code == 200:
+                    info = r.json()
+                    _record_startup("whisper", time.perf_counter() - t0)
+                    log.info("Whisper server ready: engine=%s fast_engine=%s",
+                             info.get("engine"), info.get("fast_engine"))
+                    return True
+            except requests.RequestException:
+                pass
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+        log.warning("Whisper server not ready after %.0fs; requests will be sent anyway", timeout)
+        return False
+    finally:
+        _stt_ready.set()
+
+
 def stop_whisper_server(proc):
+    global _stt_ipc
+    if _stt_ipc is not None:
+        from stt_ipc import remove_address
+        _stt_ipc.close()
+        remove_address(_stt_ipc.address)
+        _stt_ipc = None
+
     if proc is None:
         return
 
@@ -109,12 +272,105 @@ class TTSPipeline:
 
     def __init__(self):
         self._q: queue.Queue = queue.Queue()
+        self._player: "AudioPlayer | None" = None
+        # Bumped on barge-in; sentences queued under an older value are not played
+        self._play_gen = 0
+        self._play_lock = threading.Lock()
+        # Every WAV handed to Unity goes through here; paths come back pinned and are released once sent
+        self.artifacts = ArtifactStore(STREAMING_ASSETS_PATH, max_bytes=int(ARTIFACT_MAX_MB * 2**20),
+                                       max_files=ARTIFACT_MAX_FILES, lease_secs=ARTIFACT_LEASE_SECS)
+        self._rvc: "RVCEngine | None" = None
+        self._pool: "RVCPool | None" = None
+        self._pool_lock = threading.Lock()
+        # Pool mode: (text, callback, play_gen, future, from_cache) in the order the sentences were queued
+        self._deliver_q: queue.Queue = queue.Queue()
+        self._cache: "AudioCache | None" = None
         self._running = True
+        # Set once pyttsx3 and (if resident) RVC are loaded and warmed up
+        self.ready = threading.Event()
+        self._rvc_loaded = threading.Event()
+        if RVC_RESIDENT:
+            # RVC loads on its own thread, concurrently with pyttsx3 in the worker
+            threading.Thread(target=self._load_rvc, name="rvc-load", daemon=True).start()
+        else:
+            self._rvc_loaded.set()
         self._thread = threading.Thread(target=self._worker, daemon=True)
         self._thread.start()
 
+    def _load_rvc(self):
+        # load() briefly changes the process cwd; everything running alongside it uses absolute paths
+        t0 = time.perf_counter()
+        if RVC_POOL_WORKERS > 0 and TTS_AUDIO_PATH == "memory":
+            self._pool = self._start_pool()
+            if self._pool is not None:
+                threading.Thread(target=self._deliver_worker, name="rvc-deliver", daemon=True).start()
+                _record_startup("rvc", time.perf_counter() - t0)
+                self._rvc_loaded.set()
+                return
+        try:
+            from voice_engine import RVCEngine
+            rvc = RVCEngine(MODEL_PATH, work_dir=CLIENT_DIR)
+            rvc.load()  # includes a warm-up conversion
+            self._rvc = rvc
+            _record_startup("rvc", time.perf_counter() - t0)
+        except Exception as e:
+            log.warning("RVC pre-load failed, falling back to per-utterance rvc_convert: %s", e)
+            with _startup_lock:
+                _startup_expected.discard("rvc")
+        finally:
+            self._rvc_loaded.set()
+
+    def _start_pool(self):
+        pool = None
+        try:
+            from rvc_pool import RVCPool
+            pool = RVCPool(MODEL_PATH, RVC_POOL_WORKERS, RVC_POOL_THREADS, work_dir=CLIENT_DIR)
+            pool.warm()  # every worker loads and warms up its own copy of the model
+            return pool
+        except Exception as e:
+            log.warning("RVC worker pool failed to start, converting in-process instead: %s", e)
+            if pool is not None:
+                pool.close()
+            return None
+
+    def _drop_pool(self, error):
+        """A pool worker died: close the pool and convert in-process from now on."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return  # already dropped by the other thread
+        log.error("[RVC] Worker pool broke (%s); converting in-process from now on", error)
+        pool.close()
+        # Until the resident engine is loaded, sentences take the per-utterance rvc_convert path
+        threading.Thread(target=self._load_rvc_fallback, name="rvc-load", daemon=True).start()
+
+    def _load_rvc_fallback(self):
+        try:
+            from voice_engine import RVCEngine
+            rvc = RVCEngine(MODEL_PATH, work_dir=CLIENT_DIR)
+            rvc.load()
+            self._rvc = rvc
+            log.info("[RVC] In-process engine loaded")
+        except Exception as e:
+            log.warning("RVC in-process load failed, staying on per-utterance rvc_convert: %s", e)
+
+    def _warm_up_engine(self, engine):
+        """Render one short utterance so the voice and audio backend are initialised before the first reply."""
+        fd, tmp_wav = tempfile.mkstemp(suffix=".wav", dir=CLIENT_DIR)
+        os.close(fd)
+        try:
+            engine.save_to_file("Hello.", tmp_wav)
+            engine.runAndWait()
+        except Exception as e:
+            log.warning("pyttsx3 warm-up failed: %s", e)
+        finally:
+            if os.path.exists(tmp_wav):
+                os.remove(tmp_wav)
+
     def _worker(self):
+        t0 = time.perf_counter()
         try:
+            import pyttsx3
             engine = pyttsx3.init()
             voices = engine.getProperty("voices")
             for v in voices:
@@ -127,130 +383,354 @@ class TTSPipeline:
         except Exception as e:
             log.error("pyttsx3 init failed: %s", e)
             return
+        if TTS_CACHE:
+            self._cache = self._open_cache(engine)
+        self._player = self._open_player()
+        self._warm_up_engine(engine)
+        _record_startup("tts", time.perf_counter() - t0)
 
-        try:
-            prev = os.getcwd()
-            os.chdir(CLIENT_DIR)
-            _so, _se = sys.stdout, sys.stderr
-            sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
-            try:
-                pass
-            finally:
-                sys.stdout, sys.stderr = _so, _se
-                os.chdir(prev)
-            log.info("RVC model pre-loaded")
-        except Exception as e:
-            log.warning("RVC pre-load failed: %s", e)
+        self._rvc_loaded.wait()
+        self.ready.set()
 
         while self._running:
             try:
                 item = self._q.get(timeout=0.5)
                 if item is None:
                     break
-                text, callback = item
+                text, callback, play_gen, cancelled = item
+                if cancelled is not None and cancelled.is_set():
+                    # The requester went away while this was queued; don't spend RVC time on it
+                    callback("")
+                    self._q.task_done()
+                    continue
+
+                if self._pool is not None:
+                    # Render the base speech here (pyttsx3 is bound to this thread), convert in the pool,
+                    # and let the delivery thread finish sentences in the order they were queued
+                    self._deliver_q.put((text, callback, play_gen, *self._submit_to_pool(engine, text)))
+                    self._q.task_done()
+                    continue
+
+                output_path, samples = self._synthesize(engine, text)
+                if output_path and play_gen is not None and self._player is not None:
+                    self._play(output_path, samples, play_gen)
 
-                # Use unique temp file to avoid "file is being used" deadlocks between requests
-                fd, tmp_wav = tempfile.mkstemp(suffix=".wav", dir=CLIENT_DIR)
-                os.close(fd) 
-                
-                output_path = None
+                callback(output_path)
+                self._q.task_done()
 
-                try:
-                    log.info("[TTS] Step 1: Generating base speech for '%s...'", text[:30])
-                    engine.save_to_file(text, tmp_wav)
-                    engine.runAndWait()
-                    log.info("[TTS] Step 1: Base speech generated successfully.")
+            except queue.Empty:
+                continue
+            except Exception as e:
+                log.error("TTS worker error: %s", e)
+
+    def _open_cache(self, engine):
+        try:
+            from voice_engine import F0_METHOD, F0_UP_KEY
+            from tts_cache import AudioCache, voice_fingerprint
+            fingerprint = voice_fingerprint(MODEL_PATH, engine.getProperty("voice"), F0_METHOD, F0_UP_KEY)
+            return AudioCache(TTS_CACHE_DIR, fingerprint, TTS_OUTPUT_RATE,
+                              memory_bytes=int(TTS_CACHE_MEMORY_MB * 2**20),
+                              disk_bytes=int(TTS_CACHE_DISK_MB * 2**20))
+        except Exception as e:
+            log.warning("[TTS] Audio cache disabled: %s", e)
+            return None
+
+    def _open_player(self):
+        if TTS_PLAYBACK_SINK.lower() in ("off", "none", "0", ""):
+            return None
+        try:
+            from player import AudioPlayer, open_sink
+            return AudioPlayer(open_sink(TTS_PLAYBACK_SINK), TTS_OUTPUT_RATE)
+        except Exception as e:
+            log.error("[TTS] Local playback disabled (%s sink unavailable): %s", TTS_PLAYBACK_SINK, e)
+            return None
+
+    def _play(self, path: str, samples, play_gen: int):
+        if samples is None:
+            try:
+                from pcm import read_wav
+                samples, rate = read_wav(path)
+            except Exception as e:
+                log.error("[TTS] Could not load %s for playback: %s", path, e)
+                return
+        else:
+            rate = TTS_OUTPUT_RATE
+        with self._play_lock:
+            if play_gen != self._play_gen:
+                return  # the player started a new utterance while this sentence was being synthesized
+            self._player.play(samples, rate)
+
+    def barge_in(self):
+        """A new utterance arrived: stop local playback and skip sentences of earlier replies."""
+        with self._play_lock:
+            self._play_gen += 1
+            dropped = self._player.cancel() if self._player is not None else 0
+        if dropped:
+            log.info("[TTS] Barge-in: stopped %d queued sentence(s)", dropped)
+
+    def _submit_to_pool(self, engine, text: str):
+        """
+        Returns (future of (samples, rate) or None, whether it came from the audio cache).
+        Never raises: a failure comes back as a failed future, so the sentence's callback still runs in order.
+        """
+        fut = Future()
+        try:
+            samples = self._cache_lookup(text)
+            if samples is not None:
+                fut.set_result((samples, TTS_OUTPUT_RATE))
+                return fut, True
+            base = self._render_base(engine, text)
+            if base is None:
+                fut.set_result(None)
+                return fut, False
+            pool = self._pool
+            if pool is None:
+                raise BrokenProcessPool("worker pool was dropped")
+            log.info("[RVC] Step 2: Dispatching %.2fs of speech to the worker pool", len(base[0]) / max(base[1], 1))
+            return pool.submit(base[0], base[1], TTS_OUTPUT_RATE), False
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._drop_pool(e)
+            fut.set_exception(e)
+            return fut, False
 
-                    # Generate a unique path in StreamingAssets to avoid file lock issues with Unity
-                    unique_name = f"monika_resp_{int(time.time())}_{os.getpid()}.wav"
-                    target_path = os.path.join(STREAMING_ASSETS_PATH, unique_name).replace("\\", "/")
+    def _deliver_worker(self):
+        while True:
+            item = self._deliver_q.get()
+            if item is None:
+                break
+            text, callback, play_gen, fut, from_cache = item
+            output_path, samples = "", None
+            try:
+                result = fut.result(timeout=TTS_TIMEOUT_SECS)
+                if result is not None:
+                    samples = result[0]
+                    if self._cache is not None and not from_cache:
+                        self._cache.put(text, samples)
+                    output_path = self._write_output(samples)
+            except Exception as e:
+                log.error("[TTS] RVC conversion failed: %s", e)
+                if isinstance(e, BrokenProcessPool):
+                    self._drop_pool(e)
+            if output_path and play_gen is not None and self._player is not None:
+                self._play(output_path, samples, play_gen)
+            callback(output_path)
+
+    def _cache_lookup(self, text: str):
+        if self._cache is None:
+            return None
+        samples = self._cache.get(text)
+        stats = self._cache.stats()
+        log.info("[TTS] Cache %s for '%s...' (hits %d, misses %d)", "hit" if samples is not None else "miss",
+                 text[:30], stats["hits_memory"] + stats["hits_disk"], stats["misses"])
+        return samples
+
+    def _synthesize(self, engine, text: str):
+        """
+        Run pyttsx3 + RVC + resample for one piece of text (or reuse a cached clip).
+
+        Returns (WAV path or "", float32 samples at TTS_OUTPUT_RATE or None if they were never in memory).
+        """
+        samples = self._cache_lookup(text)
+        if samples is not None:
+            return self._write_output(samples), samples
+
+        if TTS_AUDIO_PATH == "memory" and self._rvc is not None:
+            samples = self._synthesize_memory(engine, text)
+            if samples is None:
+                return "", None
+            if self._cache is not None:
+                self._cache.put(text, samples)
+            return self._write_output(samples), samples
+
+        output_path = self._synthesize_file(engine, text)
+        samples = None
+        if output_path and self._cache is not None:
+            try:
+                from pcm import read_wav
+                samples, rate = read_wav(output_path)
+                if rate == TTS_OUTPUT_RATE:
+                    self._cache.put(text, samples)
+                else:
+                    samples = None
+            except Exception as e:
+                log.warning("[TTS] Could not cache %s: %s", output_path, e)
+        return output_path, samples
+
+    def _write_output(self, samples) -> str:
+        from pcm import write_wav
+        try:
+            target_path = self.artifacts.write(lambda tmp: write_wav(tmp, samples, TTS_OUTPUT_RATE))
+        except Exception as e:
+            log.error("[TTS] Failed to write output audio: %s", e)
+            return ""
+        log.info("[TTS] Audio saved to unique path: %s", target_path)
+        return target_path
+
+    def _synthesize_memory(self, engine, text: str):
+        """
+        In-memory variant of `_synthesize_file`: returns float32 samples at TTS_OUTPUT_RATE, or None.
+
+        pyttsx3 can only render to a file, so the base speech is read back once;
+        from there RVC conversion and resampling never touch the disk.
+        """
+        from resample import resample
+
+        base = self._render_base(engine, text)
+        if base is None:
+            return None
+        samples, rate = base
+
+        try:
+            log.info("[RVC] Step 2: Converting %.2fs of speech in memory", len(samples) / max(rate, 1))
+            samples, rate = self._rvc.convert(samples, rate)
+        except Exception as e:
+            log.error("[TTS] RVC conversion failed: %s", e)
+            return None
+
+        return resample(samples, rate, TTS_OUTPUT_RATE)
+
+    def _render_base(self, engine, text: str):
+        """pyttsx3 speech for `text` as (float32 samples, rate), or None."""
+        from pcm import read_wav
+
+        fd, tmp_wav = tempfile.mkstemp(suffix=".wav", dir=CLIENT_DIR)
+        os.close(fd)
+        try:
+            log.info("[TTS] Step 1: Generating base speech for '%s...'", text[:30])
+            engine.save_to_file(text, tmp_wav)
+            engine.runAndWait()
+            samples, rate = read_wav(tmp_wav)
+        except Exception as e:
+            log.error("[TTS] Base speech generation failed: %s", e)
+            return None
+        finally:
+            if os.path.exists(tmp_wav):
+                os.remove(tmp_wav)
+        return samples, rate
+
+    def _synthesize_file(self, engine, text: str) -> str:
+        from pcm import read_wav, write_wav
+        from resample import resample
+
+        # Use unique temp file to avoid "file is being used" deadlocks between requests
+        fd, tmp_wav = tempfile.mkstemp(suffix=".wav", dir=CLIENT_DIR)
+        os.close(fd)
+
+        output_path = None
+
+        try:
+            log.info("[TTS] Step 1: Generating base speech for '%s...'", text[:30])
+            engine.save_to_file(text, tmp_wav)
+            engine.runAndWait()
+            log.info("[TTS] Step 1: Base speech generated successfully.")
+
+            try:
+                log.info("[RVC] Step 2: Starting inference for %s", os.path.basename(tmp_wav))
+                if self._rvc is not None:
+                    samples, rate = read_wav(tmp_wav)
+                    converted, out_rate = self._rvc.convert(samples, rate)
+                    output_path = tmp_wav[:-4] + "_rvc.wav"
+                    write_wav(output_path, converted, out_rate)
+                else:
+                    # Call RVC directly without stdout redirection to avoid hiding errors
+                    from rvc_infer import rvc_convert
+                    output_path = rvc_convert(
+                        model_path=MODEL_PATH,
+                        input_path=tmp_wav,
+                    )
+                log.info("[RVC] Step 2: Inference finished successfully.")
+            except Exception as rvc_err:
+                log.error("[TTS] rvc_convert failed: %s", rvc_err)
+                output_path = None
 
+            log.info("[TTS] rvc_convert returned: %s", output_path)
+
+            if output_path and os.path.exists(output_path):
+                rvc_path = output_path
+                try:
+                    log.info("[TTS] Resampling to 48kHz...")
+                    samples, rate = read_wav(rvc_path)
+                    samples = resample(samples, rate, TTS_OUTPUT_RATE)
+                    output_path = self.artifacts.write(lambda tmp: write_wav(tmp, samples, TTS_OUTPUT_RATE))
+                    log.info("[TTS] Audio resampled and saved to unique path: %s", output_path)
+                except Exception as resample_err:
+                    log.error("[TTS] Resampling failed, falling back to copy: %s", resample_err)
                     try:
-                        log.info("[RVC] Step 2: Starting inference for %s", unique_name)
-                        # Call RVC directly without stdout redirection to avoid hiding errors
-                        output_path = rvc_convert(
-                            model_path=MODEL_PATH,
-                            input_path=tmp_wav,
-                        )
-                        log.info("[RVC] Step 2: Inference finished successfully.")
-                    except Exception as rvc_err:
-                        log.error("[TTS] rvc_convert failed: %s", rvc_err)
-                        output_path = None
-
-                    log.info("[TTS] rvc_convert returned: %s", output_path)
-                    
-                    if output_path and os.path.exists(output_path):
-                        try:
-                            from pydub import AudioSegment
-                            os.makedirs(STREAMING_ASSETS_PATH, exist_ok=True)
-                            
-                            log.info("[TTS] Resampling to 48kHz...")
-                            audio = AudioSegment.from_wav(output_path)
-                            audio = audio.set_frame_rate(48000)
-                            audio.export(target_path, format="wav")
-                            
-                            if os.path.exists(output_path):
-                                os.remove(output_path)
-                            
-                            output_path = target_path
-                            log.info("[TTS] Audio resampled and saved to unique path: %s", target_path)
-
-                            # --- WORKAROUND: Play sound from Python side ---
-                            def play_async(p):
-                                try:
-                                    from playsound import playsound
-                                    playsound(p)
-                                except Exception as e:
-                                    log.error("[TTS] playsound failed: %s", e)
-                            
-                            threading.Thread(target=play_async, args=(target_path,), daemon=True).start()
-                        except Exception as resample_err:
-                            log.error("[TTS] Resampling failed, falling back to copy: %s", resample_err)
-                            try:
-                                import shutil
-                                shutil.copy2(output_path, target_path)
-                                output_path = target_path
-                            except:
-                                output_path = ""
-                    else:
-                        log.error("[TTS] output_path is None or missing! RVC failed.")
+                        import shutil
+                        output_path = self.artifacts.write(lambda tmp: shutil.copy2(rvc_path, tmp))
+                    except:
                         output_path = ""
-
-                except Exception as e:
-                    log.error("TTS/RVC error: %s", e)
                 finally:
-                    if os.path.exists(tmp_wav):
-                        os.remove(tmp_wav)
+                    if os.path.exists(rvc_path):
+                        os.remove(rvc_path)
+            else:
+                log.error("[TTS] output_path is None or missing! RVC failed.")
+                output_path = ""
 
-                callback(output_path)
-                self._q.task_done()
+        except Exception as e:
+            log.error("TTS/RVC error: %s", e)
+            output_path = ""
+        finally:
+            if os.path.exists(tmp_wav):
+                os.remove(tmp_wav)
 
-            except queue.Empty:
-                continue
-            except Exception as e:
-                log.error("TTS worker error: %s", e)
+        return output_path
+
+    def speak(self, text: str, callback, play: bool = True, cancelled: threading.Event | None = None):
+        """Queue `text`; `callback(wav_path)` runs on the TTS thread.  Items whose `cancelled` is set are skipped."""
+        self._q.put((text, callback, self._play_gen if play else None, cancelled))
+
+    def merge(self, paths: list[str]) -> str:
+        """Concatenate sentence WAVs (same format, as produced by `_synthesize`) into one file for Unity."""
+        paths = [p for p in paths if p]
+        if len(paths) <= 1:
+            return paths[0] if paths else ""
+
+        import wave
+
+        def write_merged(tmp):
+            with wave.open(tmp, "wb") as out:
+                for i, p in enumerate(paths):
+                    with wave.open(p, "rb") as wf:
+                        if i == 0:
+                            out.setparams(wf.getparams())
+                        out.writeframes(wf.readframes(wf.getnframes()))
 
-    def speak(self, text: str, callback):
-        self._q.put((text, callback))
+        try:
+            target_path = self.artifacts.write(write_merged)
+        except Exception as e:
+            log.error("[TTS] Failed to merge %d sentence clips: %s", len(paths), e)
+            return paths[0]
+        # Unity only ever gets the merged clip; the sentence clips have been streamed or played already
+        for p in paths:
+            self.artifacts.discard(p)
+        return target_path
 
     def shutdown(self):
         self._running = False
         self._q.put(None)
         self._thread.join(timeout=3)
+        self._deliver_q.put(None)
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+        if self._player is not None:
+            self._player.close()
+
+
+def _speech_segments(raw: bytes, addr, cleaned=None):
+    """
+    Turn a Unity payload into (text, segments).
+
+    If Unity sent text it is returned as-is with no segments; otherwise the
+    noise-cancelled audio is split into VAD speech segments at NC_SAMPLE_RATE
+    (an empty list means there was nothing worth sending to Whisper).
+    """
+    from noise_cancel import process_samples, SAMPLE_RATE as NC_SAMPLE_RATE
+    from vad import trim_silence
 
-
-def _recv_exact(sock: socket.socket, n: int):
-    buf = b""
-    while len(buf) < n:
-        chunk = sock.recv(n - len(buf))
-        if not chunk:
-            return None
-        buf += chunk
-    return buf
-
-
-def _recognize_with_whisper(raw: bytes, addr):
-    
     try:
         speech_text = raw.decode("utf-8").strip()
     except Exception:
@@ -258,98 +738,319 @@ def _recognize_with_whisper(raw: bytes, addr):
 
     if speech_text:
         log.info("Unity payload interpreted as text from %s: %r", addr, speech_text)
-        return speech_text
+        return speech_text, []
     
-    raw = process_audio(raw)
-
-    
-    wav_io = io.BytesIO()
-    if raw[:4] == b"RIFF" and raw[8:12] == b"WAVE":
-        wav_io.write(raw)
-        wav_io.seek(0)
-        log.info("Unity payload from %s identified as WAV audio", addr)
+    if cleaned is not None:
+        log.info("Using noise-cancelled audio streamed during receipt from %s (%.3f s)",
+                 addr, len(cleaned) / NC_SAMPLE_RATE)
+        signal = cleaned
     elif raw:
-        
-        import wave
-
-        with wave.open(wav_io, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(48000)
-            wf.writeframes(raw)
-        wav_io.seek(0)
-        log.info("Unity payload from %s interpreted as PCM16 mono 48kHz", addr)
+        signal = process_samples(raw)
     else:
-        return ""
+        return "", []
+
+    if not VAD_ENABLED:
+        return "", [signal]
+    segments, dropped = trim_silence(signal, NC_SAMPLE_RATE)
+    log.info("VAD dropped %.2f s of %.2f s of audio from %s", dropped, len(signal) / NC_SAMPLE_RATE, addr)
+    if not segments:
+        log.info("No speech detected in audio from %s; skipping Whisper", addr)
+    return "", segments
+
+
+def _recognize_with_whisper(raw: bytes, addr, cleaned=None):
+    from noise_cancel import SAMPLE_RATE as NC_SAMPLE_RATE
+    from pcm import wav_bytes
+    from resample import resample
+
+    speech_text, segments = _speech_segments(raw, addr, cleaned)
+    if speech_text or not segments:
+        return speech_text
+
+    if not _stt_ready.is_set():
+        log.info("Whisper server still starting; holding request from %s until it is ready", addr)
+        _stt_ready.wait(STT_READY_TIMEOUT_SECS)
+
+    texts = []
+    for i, segment in enumerate(segments):
+        if STT_RAW_PCM:
+            text = _recognize_raw(resample(segment, NC_SAMPLE_RATE, WHISPER_RATE), addr)
+        else:
+            wav_io = io.BytesIO(wav_bytes(segment, NC_SAMPLE_RATE))
+            text = _post_whisper(wav_io, addr, "unity_audio_%d.wav" % i)
+        if text is None:
+            return ""
+        if text:
+            texts.append(text)
+
+    recognized = " ".join(texts)
+    log.info("Whisper recognition for %s returned: %r", addr, recognized)
+    return recognized
+
+
+def _post_whisper(wav_io, addr, filename: str):
+    """Send one WAV segment to the Whisper server; returns its text, or None if the request failed."""
+    import requests
 
     try:
         response = requests.post(
-            "http://127.0.0.1:5001/recognize",
-            files={"audio": ("unity_audio.wav", wav_io, "audio/wav")},
+            WHISPER_URL + "/recognize",
+            files={"audio": (filename, wav_io, "audio/wav")},
             timeout=30,
         )
         response.raise_for_status()
         j = response.json()
     except Exception as e:
         log.error("Whisper recognition request failed for %s: %s", addr, e)
-        return ""
+        return None
+    return _whisper_text(j, addr)
 
+
+def _recognize_raw(samples, addr):
+    """Prefer the local IPC transport when we launched the STT process; HTTP otherwise or if IPC could not send."""
+    from stt_ipc import IPCNotSent
+
+    ipc = _stt_ipc
+    if ipc is not None:
+        try:
+            j = ipc.recognize(samples, WHISPER_RATE, str(addr))
+        except IPCNotSent as e:
+            log.warning("STT IPC request failed for %s (%s); falling back to HTTP", addr, e)
+        except Exception as e:
+            # The server may be transcribing it already; asking again over HTTP would do it twice
+            log.error("Whisper recognition over IPC failed for %s: %r", addr, e)
+            return None
+        else:
+            if "error" in j:
+                log.error("Whisper recognition failed for %s: %s", addr, j["error"])
+                return None
+            return _whisper_text(j, addr)
+    return _post_whisper_raw(samples, addr)
+
+
+def _post_whisper_raw(samples, addr):
+    """Send float32 samples at WHISPER_RATE as the raw request body; no WAV container or multipart encoding."""
+    import requests
+
+    try:
+        response = requests.post(
+            WHISPER_URL + "/recognize_raw",
+            data=samples.astype("<f4", copy=False).tobytes(),
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Sample-Rate": str(WHISPER_RATE),
+                "X-Sample-Format": "f32le",
+                "X-Source": str(addr),
+            },
+            timeout=30,
+        )
+        response.raise_for_status()
+        j = response.json()
+    except Exception as e:
+        log.error("Whisper recognition request failed for %s: %s", addr, e)
+        return None
+    return _whisper_text(j, addr)
+
+
+def _whisper_text(j: dict, addr) -> str:
     recognized = str(j.get("text", "")).strip()
     if not recognized:
         log.warning("Whisper did not recognize speech for %s (%s)", addr, j.get("warning", "no warning"))
-
-    log.info("Whisper recognition for %s returned: %r", addr, recognized)
+    if "tier" in j:
+        log.info("Whisper tier for %s: %s", addr, j["tier"])
     return recognized
 
 
-def ask_monika(question: str) -> str | None:
+def start_server_pool():
+    """Create the Rust server connection pool and open its connections in the background."""
+    global _server_pool
+    if not SERVER_MUX:
+        return
+    timeout = float(os.getenv("CLIENT_SOCKET_TIMEOUT_SECS", "310"))
+    _server_pool = MuxPool(SERVER_HOST, SERVER_PORT, SERVER_POOL_SIZE, SERVER_SESSION_ID, timeout)
+
+    def _warm():
+        try:
+            _server_pool.warm()
+            log.info("Holding %d persistent connection(s) to the Monika AI server as %r",
+                     SERVER_POOL_SIZE, SERVER_SESSION_ID)
+        except MuxUnsupported as e:
+            _disable_server_pool(e)
+        except OSError as e:
+            log.info("Monika AI server not reachable yet (%s); connections will open on first use", e)
+
+    threading.Thread(target=_warm, name="server-pool", daemon=True).start()
+
+
+def _disable_server_pool(reason):
+    global _server_pool
+    log.warning("Monika AI server does not support persistent connections (%s); "
+                "falling back to one connection per question", reason)
+    pool, _server_pool = _server_pool, None
+    if pool is not None:
+        pool.close()
+
+
+def iter_monika(question: str):
+    """Yield reply fragments from the Rust server as they arrive; raises on protocol errors."""
+    pool = _server_pool
+    if pool is not None:
+        try:
+            yield from pool.stream(question)
+            return
+        except MuxUnsupported as e:
+            _disable_server_pool(e)
+    yield from _iter_monika_once(question)
+
+
+def _iter_monika_once(question: str):
+    """Legacy protocol: one connection per question, closed after the terminator frame."""
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
         timeout = float(os.getenv("CLIENT_SOCKET_TIMEOUT_SECS", "310"))
         sock.settimeout(timeout)
         sock.connect((SERVER_HOST, SERVER_PORT))
 
-        q_bytes = question.encode("utf-8")
-        sock.sendall(struct.pack("<I", len(q_bytes)))
-        sock.sendall(q_bytes)
+        send_frames(sock, question.encode("utf-8"))
 
-        full = ""
+        text = TextFrames()
         while True:
-            hdr = _recv_exact(sock, 4)
-            if hdr is None:
-                log.error("Server closed connection before response")
-                return None
-            (length,) = struct.unpack("<I", hdr)
-            if length == 0:
-                break
-            if length > 32 * 1024 * 1024:
-                log.error("Invalid frame length: %d", length)
-                return None
-            frame = _recv_exact(sock, length)
-            if frame is None or len(frame) < length:
-                log.error("Incomplete frame")
-                return None
-            full += frame.decode("utf-8")
+            frame = recv_frame(sock, MAX_REPLY_FRAME)
+            if frame is None:
+                raise ConnectionError("Server closed connection before response")
+            if not frame:
+                tail = text.flush()
+                if tail:
+                    yield tail
+                return
+            fragment = text.feed(frame)
+            if fragment:
+                yield fragment
+    finally:
+        sock.close()
+
 
-        return full
+def ask_monika(question: str, on_fragment=None) -> str | None:
+    try:
+        parts = []
+        for fragment in iter_monika(question):
+            parts.append(fragment)
+            if on_fragment is not None:
+                on_fragment(fragment)
+        return "".join(parts)
     except Exception as e:
         log.error("ask_monika error: %s", e)
         return None
-    finally:
-        sock.close()
 
 
-def _send_frame(conn: socket.socket, data: bytes):
-    conn.sendall(struct.pack("<I", len(data)))
-    conn.sendall(data)
+def cached_reply(question: str, tts: TTSPipeline | None = None):
+    """
+    (text, audio) given last time `question` was asked, or None. audio is "" if its file is gone;
+    otherwise it is pinned in `tts.artifacts` until the response has been sent.
+    """
+    if _reply_cache is None or REPLY_CACHE_BYPASS:
+        return None
+    hit = _reply_cache.get(question)
+    if hit is None:
+        return None
+    text, audio = hit
+    if audio and not (tts.artifacts.pin(audio) if tts is not None else os.path.exists(audio)):
+        audio = ""
+    log.info("Reply cache hit for %r (%s)", question[:60], _reply_cache.stats())
+    return text, audio
+
+
+def remember_reply(question: str, answer: str | None, audio: str, tts_enabled: bool):
+    # A reply whose audio never arrived would be replayed silent; leave it for the next attempt
+    if _reply_cache is None or not answer or (tts_enabled and not audio):
+        return
+    _reply_cache.put(question, answer, audio)
+
+
+def _speak_async(tts: TTSPipeline, text: str, on_audio=None):
+    """Queue `text` for TTS; returns (done_event, result_holder) to wait on for its WAV path."""
+    done_event = threading.Event()
+    result_holder = [None]
 
+    def on_done(wav_path):
+        result_holder[0] = wav_path
+        if wav_path and on_audio is not None:
+            on_audio()
+        done_event.set()
 
-def _send_json(conn: socket.socket, payload: dict):
-    _send_frame(conn, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    tts.speak(text, on_done)
+    return done_event, result_holder
 
 
-def _send_end(conn: socket.socket):
-    conn.sendall(struct.pack("<I", 0))
+def stream_reply(question: str, tts: TTSPipeline, on_fragment=None):
+    """
+    Stream the reply from the Rust server, queueing each clause for TTS as soon
+    as the segmenter closes it, so the first sentence is being synthesized (and
+    played) while the LLM is still generating the rest.  `on_fragment` sees
+    every text fragment as it arrives.
+
+    Returns (answer, pending) without waiting for the audio; answer is None if
+    the server was unreachable.  Pass `pending` to `collect_audio`.
+    """
+    segmenter = SentenceSegmenter()
+    parts: list[str] = []
+    pending: list[tuple[threading.Event, list]] = []
+    t0 = time.perf_counter()
+    first_audio = threading.Event()
+
+    def on_audio():
+        if not first_audio.is_set():
+            first_audio.set()
+            log.info("[TTS] First audio ready after %.2fs", time.perf_counter() - t0)
+
+    def _voice(clause: str):
+        log.info("[TTS] Queueing sentence %d: %s", len(pending) + 1, clause[:60])
+        pending.append(_speak_async(tts, clause, on_audio))
+
+    try:
+        for fragment in iter_monika(question):
+            parts.append(fragment)
+            if on_fragment is not None:
+                on_fragment(fragment)
+            for clause in segmenter.feed(fragment):
+                _voice(clause)
+    except Exception as e:
+        log.error("ask_monika error: %s", e)
+        if not parts:
+            return None, pending
+
+    for clause in segmenter.flush():
+        _voice(clause)
+    return "".join(parts), pending
+
+
+def collect_audio(pending, tts: TTSPipeline, on_clip=None) -> str:
+    """
+    Wait (up to TTS_TIMEOUT_SECS overall) for queued clauses and merge them into one clip for Unity.
+
+    `on_clip(path)` is called for each clause, in order, as soon as it (and those before it) are ready.
+    """
+    deadline = time.monotonic() + TTS_TIMEOUT_SECS
+    paths = []
+    for done_event, result_holder in pending:
+        done_event.wait(timeout=max(0.0, deadline - time.monotonic()))
+        if result_holder[0]:
+            paths.append(str(result_holder[0]))
+            if on_clip is not None:
+                on_clip(paths[-1])
+    return tts.merge(paths)
+
+
+def _send_response(conn: socket.socket, payload: dict, out: ResponseWriter | None = None):
+    """v1: JSON frame plus the zero-length end frame, in one vectored send. v2: whatever is unsent, then END."""
+    if out is None:
+        send_frames(conn, json.dumps(payload, ensure_ascii=False).encode("utf-8"), b"")
+        return
+    if not out.text_sent:
+        out.text(payload.get("text", ""))
+    if not out.sentences_sent and payload.get("audio"):
+        out.audio_file(payload["audio"])
+    out.end(payload)
 
 
 def _encode_audio_file_base64(audio_path: str) -> str:
@@ -360,9 +1061,126 @@ def _encode_audio_file_base64(audio_path: str) -> str:
         log.error("Failed to base64-encode audio file '%s': %s", audio_path, e)
         return ""
 
-_busy_lock = threading.Lock()
+class Turn(Job):
+    """One Unity request as it moves through the pipeline stages."""
+
+    def __init__(self, conn: socket.socket, addr, tts: TTSPipeline | None, raw: bytes, cleaned=None,
+                 protocol: int = 1):
+        super().__init__()
+        self.conn = conn
+        # v2 clients get typed frames as results become available; v1 gets one JSON reply at the end
+        self.out = ResponseWriter(conn) if protocol >= 2 else None
+        self.addr = addr
+        self.tts = tts
+        self.raw = raw
+        self.cleaned = cleaned
+        self.speech_text = ""
+        self.answer: str | None = None
+        self.pending: list[tuple[threading.Event, list]] = []
+        self.audio = ""
+        # Set when the answer came from the server (or the reply cache) and may be cached
+        self.cacheable = False
+        # Seconds from the question going to the server until its first fragment came back
+        self.ttft: float | None = None
+
+
+def _stage_stt(turn: Turn) -> bool:
+    turn.speech_text = _recognize_with_whisper(turn.raw, turn.addr, turn.cleaned)
+    # The payload is no longer needed; don't hold megabytes of audio while the turn waits downstream
+    turn.raw = turn.cleaned = None
+    if not turn.speech_text:
+        log.warning("No speech text extracted from Unity audio payload %s", turn.addr)
+        return False
+    log.info("Player said: %s", turn.speech_text)
+    if turn.tts is not None:
+        turn.tts.barge_in()
+    return True
+
+
+def _stage_llm(turn: Turn) -> bool:
+    hit = cached_reply(turn.speech_text, turn.tts)
+    if hit is not None:
+        turn.answer, turn.audio = hit
+        if turn.audio or turn.tts is None:
+            return False  # nothing left to do but respond
+        # The cached clip was cleaned up; voice the text again (the TTS cache makes this cheap)
+        turn.cacheable = True
+        turn.pending = [_speak_async(turn.tts, turn.answer)]
+        return True
+
+    t0 = time.perf_counter()
+
+    def on_fragment(fragment: str):
+        if turn.ttft is None:
+            turn.ttft = time.perf_counter() - t0
+            log.info("[LLM] First token after %.2fs", turn.ttft)
+        if turn.out is not None:
+            turn.out.text(fragment)  # subtitles render while the rest is still generating
+
+    streaming = TTS_STREAMING and turn.tts is not None
+    if streaming:
+        turn.answer, turn.pending = stream_reply(turn.speech_text, turn.tts, on_fragment)
+    else:
+        turn.answer = ask_monika(turn.speech_text, on_fragment)
+    elapsed = time.perf_counter() - t0
+
+    if turn.answer is None:
+        log.warning("Server not available, sending recognized speech text instead")
+        turn.answer = turn.speech_text
+        return False
+    turn.cacheable = True
+    if streaming:
+        log.info("AI replied in %.2fs, sentences queued for TTS as they arrived: %s", elapsed, turn.answer[:80])
+    else:
+        log.info("AI replied in %.2fs: %s", elapsed, turn.answer[:80])
+        log.info("[TTS-CHECK] tts=%s", turn.tts)
+        if turn.tts is not None:
+            turn.pending = [_speak_async(turn.tts, turn.answer)]
+    return True
+
+
+def _stage_tts(turn: Turn) -> bool:
+    if turn.tts is not None and turn.pending:
+        turn.audio = collect_audio(turn.pending, turn.tts, turn.out.audio_file if turn.out is not None else None)
+    if turn.cacheable:
+        remember_reply(turn.speech_text, turn.answer, turn.audio, turn.tts is not None)
+    return True
+
+
+def _stage_respond(turn: Turn) -> bool:
+    try:
+        answer = turn.answer if turn.answer is not None else turn.speech_text
+        # The final frame carries the audio reference (v1: the only frame; v2: END after the deltas)
+        _send_response(turn.conn, {"text": answer or "", "audio": turn.audio}, turn.out)
+        done = time.perf_counter()
+        first_frame = turn.out.first_frame_at if turn.out is not None and turn.out.first_frame_at else done
+        log.info("Response sent to %s (audio=%s, protocol v%d) after %.2fs: %s", turn.addr,
+                 "yes" if turn.audio else "no", 1 if turn.out is None else 2, done - turn.created,
+                 turn.timing_summary())
+        log.info("[latency] %s: time to first token %s, time to first frame to Unity %.2fs", turn.addr,
+                 f"{turn.ttft:.2f}s" if turn.ttft is not None else "n/a", first_frame - turn.created)
+    except OSError as e:
+        log.warning("Could not send response to %s: %s", turn.addr, e)
+    finally:
+        turn.conn.close()
+        if turn.tts is not None and turn.audio:
+            turn.tts.artifacts.release(turn.audio)
+    return True
+
+
+def build_pipeline() -> StagedPipeline:
+    return StagedPipeline(
+        [
+            ("stt", _stage_stt, PIPELINE_STT_WORKERS),
+            ("llm", _stage_llm, PIPELINE_LLM_WORKERS),
+            ("tts", _stage_tts, PIPELINE_TTS_WORKERS),
+            ("respond", _stage_respond, PIPELINE_RESPOND_WORKERS),
+        ],
+        depth=PIPELINE_QUEUE_DEPTH,
+    )
 
-def handle_unity_connection(conn: socket.socket, addr, tts: TTSPipeline | None):
+
+def note_unity_connected(addr):
     global UNITY_CONNECTED
 
     with UNITY_CONNECTED_LOCK:
@@ -374,80 +1192,129 @@ def handle_unity_connection(conn: socket.socket, addr, tts: TTSPipeline | None):
             log.info("Unity connected from %s", addr)
             print("[STATUS] Unity connection re-established")
 
-    if not _busy_lock.acquire(blocking=False):
-        log.warning("Rejecting connection from %s: already processing a request.", addr)
-        conn.close()
-        return
 
+def handle_unity_connection(conn: socket.socket, addr, tts: TTSPipeline | None, pipeline: StagedPipeline):
+    """Read one request from Unity and hand it to the pipeline, which replies and closes `conn`."""
+    note_unity_connected(addr)
+
+    handed_off = False
     try:
-        hdr = _recv_exact(conn, 4)
+        hdr = recv_exact(conn, 4)
         if hdr is None:
             log.warning("Connection from %s closed before header received", addr)
             return
 
         (length,) = struct.unpack("<I", hdr)
-        log.info("Received frame header from %s: length=%d", addr, length)
+        protocol = 1
+        if length == REQUEST_MAGIC:
+            protocol = 2
+            hdr = recv_exact(conn, 4)
+            if hdr is None:
+                log.warning("Connection from %s closed before header received", addr)
+                return
+            (length,) = struct.unpack("<I", hdr)
+        log.info("Received frame header from %s: length=%d, protocol v%d", addr, length, protocol)
 
         max_len = 5 * 1024 * 1024
         if length == 0 or length > max_len:
             log.warning("Invalid speech length from %s: %d (max %d)", addr, length, max_len)
             return
 
-        raw = _recv_exact(conn, length)
+        if NOISE_STREAMING:
+            from noise_cancel import PayloadCleaner
+            cleaner = PayloadCleaner()
+        else:
+            cleaner = None
+        raw = recv_exact(conn, length, cleaner.feed if cleaner else None)
         if raw is None:
             log.warning("Connection from %s closed while reading payload", addr)
             return
 
         has_audio_packet = bool(raw)
         log.info("Unity audio packet received from %s: %s (bytes=%d)", addr, "yes" if has_audio_packet else "no", len(raw))
-        log.info("Received raw payload from %s (%d bytes): %s", addr, len(raw), raw[:64])
+        log.info("Received raw payload from %s (%d bytes): %s", addr, len(raw), bytes(raw[:64]))
 
-        speech_text = _recognize_with_whisper(raw, addr)
-        if not speech_text:
-            log.warning("No speech text extracted from Unity audio payload %s", addr)
-            _send_json(conn, {"text": "", "audio": ""})
-            _send_end(conn)
+        turn = Turn(conn, addr, tts, raw, cleaner.result() if cleaner else None, protocol)
+        if pipeline.submit(turn, PIPELINE_ADMIT_TIMEOUT_SECS):
+            handed_off = True
             return
 
-        log.info("Player said: %s", speech_text)
+        log.warning("Shedding request from %s: pipeline full (%s)", addr, pipeline.stats())
+        _send_response(conn, {"text": "", "audio": "", "error": "busy"}, turn.out)
+    except Exception as e:
+        log.error("Connection handler error: %s", e)
+    finally:
+        if not handed_off:
+            conn.close()
 
-        t0 = time.perf_counter()
-        answer = ask_monika(speech_text)
-        elapsed = time.perf_counter() - t0
-        audio_payload = ""
 
-        if answer is None:
-            log.warning("Server not available, sending recognized speech text instead")
-            answer = speech_text  
-        else:
-            log.info("AI replied in %.2fs: %s", elapsed, answer[:80])
+# Needed by the first audio request; imported behind the open listener
+PRELOAD_MODULES = ("numpy", "noise_cancel", "vad", "resample", "pcm", "requests")
 
-            log.info("[TTS-CHECK] tts=%s, pyttsx3=%s", tts, pyttsx3)
-            if tts is not None and pyttsx3 is not None:
-                done_event = threading.Event()
-                result_holder = [None]
+# Reported by --profile-imports
+PROFILED_MODULES = ("numpy", "requests", "dotenv", "pyttsx3", "sounddevice", "torch", "rvc_infer",
+                    "noise_cancel", "vad", "resample", "pcm", "stt_ipc", "voice_engine", "client")
 
-                def on_tts_done(wav_path):
-                    result_holder[0] = wav_path
-                    done_event.set()
 
-                tts.speak(answer, on_tts_done)
-                done_event.wait(timeout=120)
-                log.info("[TTS-CHECK] result_holder[0]=%s", result_holder[0])
-                if result_holder[0]:
-                    audio_payload = str(result_holder[0])
+def _preload(modules):
+    """Import `modules` on a background thread so the first request does not pay for them."""
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            log.warning("[startup] Preloading %s failed: %s", name, e)
+            continue
+        log.info("[startup] Preloaded %s in %.0f ms", name, (time.perf_counter() - t0) * 1000)
+
+
+def profile_imports(modules=PROFILED_MODULES):
+    """
+    Print each module's cold import cost, measured with `python -X importtime` in a fresh interpreter.
+
+    Costs are standalone, so shared dependencies (numpy under torch, say) count towards every
+    module that pulls them in. "client" is the cost of importing the bridge itself.
+    """
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (CLIENT_DIR, _rvc_pipe_dir, _rvc_dir, env.get("PYTHONPATH")) if p)
+    rows = []
+    for name in modules:
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {name}"],
+                              cwd=CLIENT_DIR, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            rows.append((name, None))
+            continue
+        cumulative_us = 0
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _, cumulative, module = line[len("import time:"):].split("|")
+            if module.strip() == name and cumulative.strip().isdigit():
+                cumulative_us = int(cumulative)
+        rows.append((name, cumulative_us / 1000))
 
-        _send_json(conn, {"text": answer, "audio": audio_payload})
-        _send_end(conn)
+    print(f"{'module':<16} {'import ms':>10}")
+    for name, ms in sorted(rows, key=lambda r: -1 if r[1] is None else r[1], reverse=True):
+        print(f"{name:<16} {'failed' if ms is None else f'{ms:.1f}':>10}")
 
-        log.info("Unity response completed, audio in response: %s, audio_b64_len=%d", "yes" if audio_payload else "no", len(audio_payload) if audio_payload else 0)
-        log.info("Response sent (audio=%s)", "yes" if audio_payload else "no")
 
+def start_tts() -> TTSPipeline | None:
+    """Create the TTS pipeline (it loads pyttsx3 and RVC in the background), or None if TTS is off."""
+    if os.getenv("ENABLE_TTS", "1").lower() not in ("1", "true", "yes"):
+        return None
+    if importlib.util.find_spec("pyttsx3") is None:
+        log.warning("pyttsx3 is not installed; TTS disabled")
+        return None
+    try:
+        _startup_expected.add("tts")
+        if RVC_RESIDENT:
+            _startup_expected.add("rvc")
+        tts = TTSPipeline()
+        log.info("TTS + RVC pipeline loading in the background")
+        return tts
     except Exception as e:
-        log.error("Connection handler error: %s", e)
-    finally:
-        _busy_lock.release()
-        conn.close()
+        log.warning("TTS init failed: %s", e)
+        return None
 
 
 def main():
@@ -457,23 +1324,23 @@ def main():
     log.info("Listening for Unity on %s:%d", UNITY_HOST, UNITY_PORT)
     log.info("Monika AI server at  %s:%d", SERVER_HOST, SERVER_PORT)
 
-    
-    whisper_proc = start_whisper_server()
-
-    enable_tts = os.getenv("ENABLE_TTS", "1").lower() in ("1", "true", "yes")
-    tts = None
-    if enable_tts and pyttsx3 is not None:
-        try:
-            tts = TTSPipeline()
-            log.info("TTS + RVC pipeline ready")
-        except Exception as e:
-            log.warning("TTS init failed: %s", e)
-
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server.bind((UNITY_HOST, UNITY_PORT))
     server.listen(4)
     server.settimeout(1.0)
+    log.info("[startup] Listener accepting after %.0f ms", (time.perf_counter() - _BOOT_T0) * 1000)
+
+    # Whisper (its own process), pyttsx3 and RVC all load concurrently behind the open
+    # listener; STT requests wait on the server's readiness
+    whisper_proc = start_whisper_server()
+    _startup_expected.add("whisper")
+    threading.Thread(target=wait_for_whisper, args=(whisper_proc,), name="stt-ready", daemon=True).start()
+
+    tts = start_tts()
+    pipeline = build_pipeline()
+    start_server_pool()
+    threading.Thread(target=_preload, args=(PRELOAD_MODULES,), name="preload", daemon=True).start()
     log.info("Waiting for Unity connections...")
 
     stop_event = threading.Event()
@@ -493,7 +1360,7 @@ def main():
                 conn, addr = server.accept()
                 log.info("Unity connection received from %s", addr)
                 t = threading.Thread(
-                    target=handle_unity_connection, args=(conn, addr, tts), daemon=True
+                    target=handle_unity_connection, args=(conn, addr, tts, pipeline), daemon=True
                 )
                 t.start()
             except socket.timeout:
@@ -512,10 +1379,19 @@ def main():
             server.close()
         except Exception:
             pass
+        pipeline.shutdown()
+        if _server_pool is not None:
+            _server_pool.close()
         if tts:
             tts.shutdown()
         stop_whisper_server(whisper_proc)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Unity <-> Monika AI server bridge")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="print the cold import cost of each heavy dependency and exit")
+    if parser.parse_args().profile_imports:
+        profile_imports()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+framing.py
+----------
+Length-prefixed framing shared by every bridge socket.
+
+The Unity <-> bridge, bridge <-> Rust server and bridge <-> STT (IPC)
+protocols are all built from little-endian u32 length prefixes followed
+by a body.  This module does that byte shuffling once, without the
+copies the ad-hoc versions made:
+
+    * reads land directly in one preallocated bytearray via recv_into,
+      however many recv calls it takes (no quadratic `buf += chunk`);
+    * header and body go out in one vectored sendmsg() call where the
+      platform has it (one syscall, no concatenation), otherwise one
+      sendall of the joined buffer (Windows has no sendmsg);
+    * text streamed across frames is decoded incrementally, so a UTF-8
+      character split between two frames comes out whole.
+
+Public API
+----------
+    recv_exact(sock, n, on_chunk=None) -> bytes-like | None  # None on EOF
+    recv_frame(sock, limit) -> bytes-like | None             # None on EOF before the header
+    send_frames(sock, *bodies)                               # u32 length + body, each
+    send_vectored(sock, parts)                               # raw buffers, one call
+    TextFrames().feed(frame) -> str / .flush() -> str
+"""
+
+import codecs
+import socket
+import struct
+
+HEADER = struct.Struct("<I")
+
+# Granularity of on_chunk callbacks (e.g. streaming noise cancellation while a payload arrives)
+CALLBACK_CHUNK = 65536
+# Below this, one plain recv()/sendall() beats setting up buffers and views
+SMALL = 65536
+
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+
+def recv_exact(sock: socket.socket, n: int, on_chunk=None):
+    """Read exactly n bytes into one preallocated buffer, handing each received piece to on_chunk. None on EOF."""
+    if n <= 0:
+        return b""  # recv(0) returns b"" too, which would read as EOF
+    got = 0
+    if n <= SMALL:
+        # Usually the whole (small) read is already buffered in the kernel
+        first = sock.recv(n)
+        if len(first) == n or not first:
+            if first and on_chunk is not None:
+                on_chunk(memoryview(first))
+            return first or None
+        got = len(first)
+    buf = bytearray(n)
+    view = memoryview(buf)
+    if got:
+        view[:got] = first
+        if on_chunk is not None:
+            on_chunk(view[:got])
+    while got < n:
+        want = min(n - got, CALLBACK_CHUNK) if on_chunk is not None else n - got
+        k = sock.recv_into(view[got:], want)
+        if not k:
+            return None
+        if on_chunk is not None:
+            on_chunk(view[got:got + k])
+        got += k
+    return buf
+
+
+def recv_frame(sock: socket.socket, limit: int):
+    """Read one `u32 len | body` frame; None if the peer closed before the header."""
+    hdr = recv_exact(sock, HEADER.size)
+    if hdr is None:
+        return None
+    (length,) = HEADER.unpack(hdr)
+    if length > limit:
+        raise ValueError(f"Frame too large: {length} bytes (limit {limit})")
+    if not length:
+        return bytearray()
+    body = recv_exact(sock, length)
+    if body is None:
+        raise ConnectionError("Connection closed in the middle of a frame")
+    return body
+
+
+def send_vectored(sock: socket.socket, parts):
+    """Send `parts` back to back as if concatenated, without concatenating them."""
+    total = sum(len(p) for p in parts)
+    if total <= SMALL or not _HAS_SENDMSG:
+        sock.sendall(b"".join(parts))
+        return
+    sent = sock.sendmsg(parts)
+    if sent == total:
+        return
+    views = [memoryview(p).cast("B") for p in parts if len(p)]
+    while views:
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+        if views:
+            sent = sock.sendmsg(views)
+
+
+def send_frames(sock: socket.socket, *bodies):
+    """Send each body as a `u32 len | body` frame; an empty body is a bare zero header."""
+    parts = []
+    for body in bodies:
+        parts.append(HEADER.pack(len(body)))
+        parts.append(body)
+    send_vectored(sock, parts)
+
+
+class TextFrames:
+    """Decode text that arrives as a sequence of frames without splitting multi-byte characters."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, frame) -> str:
+        return self._decoder.decode(frame)
+
+    def flush(self) -> str:
+        return self._decoder.decode(b"", final=True)
@@ -12,12 +12,28 @@ Algorithm:
 Public API
 ----------
     process_audio(raw: bytes) -> bytes
+    process_samples(raw: bytes) -> np.ndarray     # same, without the WAV wrapper
 
     `raw` may be either:
       • a valid WAV file (RIFF header present), or
       • raw PCM-16 mono 16 kHz bytes (no header).
 
     Always returns a WAV file (bytes) at 16-bit mono 16 kHz.
+
+Streaming API
+-------------
+    nc = NoiseCanceller()
+    out = nc.process(samples)      # float32 chunk of any size -> cleaned float32
+    out = nc.process_pcm(pcm16)    # same, from raw PCM-16 LE bytes
+    out = nc.flush()               # drain the overlap-add tail at end of stream
+
+    The noise floor is bootstrapped from the first N_NOISE_FRAMES frames
+    and then tracked from quiet frames; gain follows a smoothed speech
+    level instead of the whole-utterance RMS.  Output lags input by at
+    most one frame once the bootstrap window has been received.
+
+    PayloadCleaner wraps a NoiseCanceller for a Unity payload arriving in
+    pieces (bare PCM or a WAV whose header is parsed on the fly).
 """
 
 import io
@@ -45,6 +61,13 @@ TARGET_RMS       = 0.15     # target RMS level after adaptive gain (0-1 float)
 MAX_GAIN         = 8.0      # hard ceiling on adaptive gain multiplier
 MIN_GAIN         = 0.5      # hard floor  (don't amplify already-loud signals past this)
 
+NOISE_ADAPT      = 0.95     # per-frame smoothing of the running noise floor (streaming)
+NOISE_GATE       = 2.0      # frames below this × noise power count as noise (streaming)
+GAIN_SMOOTH      = 0.9      # per-frame smoothing of the speech level driving gain (streaming)
+
+_WINDOW          = np.hanning(FRAME_SIZE)
+_NOISE_BOOT      = len(range(0, FRAME_SIZE * N_NOISE_FRAMES, HOP_SIZE))   # frames in the noise estimate
+
 
 # ---------------------------------------------------------------------------
 # Internal helpers
@@ -89,64 +112,72 @@ def _wrap_wav(pcm16: bytes) -> bytes:
 # Spectral subtraction
 # ---------------------------------------------------------------------------
 
+def _frame(signal: np.ndarray) -> np.ndarray:
+    """
+    Return a (n_frames, FRAME_SIZE) windowed copy of `signal`, one row per hop.
+
+    The tail is zero-padded so that every sample is covered by a frame
+    starting at or before it (same framing as the original hop loop).
+    """
+    n        = len(signal)
+    n_frames = -(-n // HOP_SIZE)
+    padded   = np.zeros((n_frames - 1) * HOP_SIZE + FRAME_SIZE, dtype=np.float64)
+    padded[:n] = signal
+    frames = np.lib.stride_tricks.sliding_window_view(padded, FRAME_SIZE)[::HOP_SIZE]
+    return frames * _WINDOW
+
+
+def _overlap_add(frames: np.ndarray) -> np.ndarray:
+    """Sum rows of `frames` placed HOP_SIZE apart (FRAME_SIZE must be a multiple of HOP_SIZE)."""
+    n_frames = len(frames)
+    out = np.zeros((n_frames - 1) * HOP_SIZE + FRAME_SIZE)
+    for r in range(FRAME_SIZE // HOP_SIZE):
+        seg = out[r * HOP_SIZE:r * HOP_SIZE + n_frames * HOP_SIZE]
+        seg.reshape(n_frames, HOP_SIZE)[:] += frames[:, r * HOP_SIZE:(r + 1) * HOP_SIZE]
+    return out
+
+
+def _subtract_noise(spectrum: np.ndarray, noise_mag: np.ndarray) -> np.ndarray:
+    """Over-subtract `noise_mag` from every row's magnitude, keep the phase, floor the residual."""
+    magnitude = np.abs(spectrum)
+    clean_mag = np.maximum(magnitude - OVER_SUBTRACT * noise_mag, SPECTRAL_FLOOR * noise_mag)
+    phase     = np.divide(spectrum, magnitude, out=np.ones_like(spectrum), where=magnitude > 0)
+    return clean_mag * phase
+
+
 def _spectral_subtract(signal: np.ndarray) -> np.ndarray:
     """
     Reduce background noise via overlap-add spectral subtraction.
 
     Steps
     -----
-    1.  Estimate the noise power spectrum from the first N_NOISE_FRAMES frames.
-    2.  For every frame subtract OVER_SUBTRACT * noise_power from the magnitude
-        spectrum, flooring at SPECTRAL_FLOOR * noise_power to avoid artefacts.
-    3.  Reconstruct the waveform with overlap-add (OLA).
+    1.  Slice the signal into all overlapping windowed frames at once
+        (strided view) and take one batched rfft over them.
+    2.  Estimate the noise power spectrum from the first N_NOISE_FRAMES frames.
+    3.  For every frame subtract OVER_SUBTRACT * noise magnitude from the
+        magnitude spectrum, flooring at SPECTRAL_FLOOR * noise magnitude.
+    4.  One batched irfft, then vectorised overlap-add (OLA).
     """
-    n      = len(signal)
-    window = np.hanning(FRAME_SIZE)
-
-    # --- Step 1: noise estimation ---------------------------------------
-    noise_power = np.zeros(FRAME_SIZE)
-    frames_used = 0
-    for start in range(0, FRAME_SIZE * N_NOISE_FRAMES, HOP_SIZE):
-        end = start + FRAME_SIZE
-        if end > n:
-            break
-        frame  = signal[start:end] * window
-        power  = np.abs(np.fft.rfft(frame, n=FRAME_SIZE)) ** 2
-        noise_power += power
-        frames_used += 1
-
-    if frames_used == 0:
-        log.warning("Audio too short for noise estimation – skipping spectral subtraction")
+    n = len(signal)
+    if n == 0:
         return signal
 
-    noise_power /= frames_used
-    log.debug("Noise estimated from %d frames", frames_used)
-
-    # --- Step 2 & 3: subtract & reconstruct ----------------------------
-    output      = np.zeros(n + FRAME_SIZE)
-    window_sum  = np.zeros(n + FRAME_SIZE)
-
-    for start in range(0, n, HOP_SIZE):
-        end   = start + FRAME_SIZE
-        frame = np.zeros(FRAME_SIZE)
-        actual = min(FRAME_SIZE, n - start)
-        frame[:actual] = signal[start:start + actual]
-        frame *= window
+    frames   = _frame(signal)
+    spectrum = np.fft.rfft(frames, n=FRAME_SIZE, axis=1)
 
-        spectrum   = np.fft.rfft(frame, n=FRAME_SIZE)
-        magnitude  = np.abs(spectrum)
-        phase      = np.angle(spectrum)
-
-        # Spectral subtraction with floor
-        clean_mag  = magnitude - OVER_SUBTRACT * np.sqrt(noise_power)
-        floor_mag  = SPECTRAL_FLOOR * np.sqrt(noise_power)
-        clean_mag  = np.maximum(clean_mag, floor_mag)
+    # --- noise estimation: leading frames that lie fully inside the signal ---
+    noise_frames = min(_NOISE_BOOT, max(0, (n - FRAME_SIZE) // HOP_SIZE + 1))
+    if noise_frames == 0:
+        log.warning("Audio too short for noise estimation – skipping spectral subtraction")
+        return signal
 
-        clean_spec = clean_mag * np.exp(1j * phase)
-        clean_frame = np.fft.irfft(clean_spec, n=FRAME_SIZE) * window
+    noise_power = np.mean(np.abs(spectrum[:noise_frames]) ** 2, axis=0)
+    log.debug("Noise estimated from %d frames", noise_frames)
 
-        output[start:start + FRAME_SIZE]     += clean_frame
-        window_sum[start:start + FRAME_SIZE] += window ** 2
+    # --- subtract & reconstruct --------------------------------------------
+    clean = np.fft.irfft(_subtract_noise(spectrum, np.sqrt(noise_power)), n=FRAME_SIZE, axis=1)
+    output = _overlap_add(clean * _WINDOW)
+    window_sum = _overlap_add(np.broadcast_to(_WINDOW ** 2, frames.shape))
 
     # Normalise by the OLA window sum (avoid divide-by-zero)
     nonzero = window_sum > 1e-8
@@ -181,6 +212,11 @@ def process_audio(raw: bytes) -> bytes:
         log.warning("process_audio received empty payload – returning as-is")
         return raw
 
+    return _wrap_wav(_float32_to_bytes(process_samples(raw)))
+
+
+def process_samples(raw: bytes) -> np.ndarray:
+    """Clean `raw` (WAV or bare PCM-16) and return float32 samples at SAMPLE_RATE."""
     pcm = _read_audio(raw)
     signal = _bytes_to_float32(pcm)
 
@@ -188,10 +224,205 @@ def process_audio(raw: bytes) -> bytes:
              len(signal) / SAMPLE_RATE,
              float(np.sqrt(np.mean(signal ** 2))) if len(signal) else 0.0)
 
-    # signal = _spectral_subtract(signal)
+    signal = _spectral_subtract(signal)
     signal = _adaptive_gain(signal)
 
     log.info("noise_cancel: output RMS=%.4f",
              float(np.sqrt(np.mean(signal ** 2))) if len(signal) else 0.0)
 
-    return _wrap_wav(_float32_to_bytes(signal))
\ No newline at end of file
+    return signal.astype(np.float32)
+
+
+# ---------------------------------------------------------------------------
+# Streaming API
+# ---------------------------------------------------------------------------
+
+class NoiseCanceller:
+    """Chunk-by-chunk spectral subtraction + adaptive gain with state carried across calls."""
+
+    def __init__(self):
+        self._pending    = np.zeros(0)                        # input from the next frame start on
+        self._tail       = np.zeros(FRAME_SIZE - HOP_SIZE)    # OLA carry: output
+        self._wtail      = np.zeros(FRAME_SIZE - HOP_SIZE)    # OLA carry: window sum
+        self._held       = []                                 # spectra waiting for the noise bootstrap
+        self._noise      = None                               # running noise power spectrum
+        self._level      = None                               # smoothed speech mean-square
+        self._gain       = 1.0
+        self._odd        = b""
+        self._n_in       = 0
+        self._n_out      = 0
+        self._n_frames   = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Feed float32 samples in [-1, 1]; returns every cleaned sample that is now final."""
+        x = np.asarray(samples, dtype=np.float64).ravel()
+        self._n_in += len(x)
+        self._pending = np.concatenate((self._pending, x))
+        return self._run(final=False)
+
+    def process_pcm(self, pcm16: bytes) -> np.ndarray:
+        """Feed raw PCM-16 LE bytes (odd trailing bytes are carried to the next call)."""
+        data = self._odd + bytes(pcm16)
+        cut = len(data) - len(data) % 2
+        self._odd = data[cut:]
+        return self.process(_bytes_to_float32(data[:cut]))
+
+    def flush(self) -> np.ndarray:
+        """Zero-pad the last partial frame and return the remaining output."""
+        if self._noise is None and self._n_in < FRAME_SIZE:
+            log.warning("Audio too short for noise estimation – skipping spectral subtraction")
+            out, self._pending = self._pending[:self._n_in], np.zeros(0)
+            self._n_out += len(out)
+            return self._apply_gain(out, 1).astype(np.float32)
+        needed = -(-self._n_in // HOP_SIZE) - self._n_frames
+        if needed > 0:
+            size = (needed - 1) * HOP_SIZE + FRAME_SIZE
+            self._pending = np.concatenate((self._pending, np.zeros(max(0, size - len(self._pending)))))
+        return self._run(final=True)
+
+    # -- internals ----------------------------------------------------------
+
+    def _run(self, final: bool) -> np.ndarray:
+        n_frames = 0
+        if len(self._pending) >= FRAME_SIZE:
+            n_frames = (len(self._pending) - FRAME_SIZE) // HOP_SIZE + 1
+        if final:
+            n_frames = min(n_frames, max(0, -(-self._n_in // HOP_SIZE) - self._n_frames))
+        if n_frames:
+            frames = np.lib.stride_tricks.sliding_window_view(self._pending, FRAME_SIZE)[::HOP_SIZE][:n_frames]
+            self._held.append(np.fft.rfft(frames * _WINDOW, n=FRAME_SIZE, axis=1))
+            self._pending = self._pending[n_frames * HOP_SIZE:]
+            self._n_frames += n_frames
+
+        held = sum(len(h) for h in self._held)
+        if held == 0 or self._noise is None and held < _NOISE_BOOT and not final:
+            return np.zeros(0, dtype=np.float32)
+
+        spectrum = np.concatenate(self._held) if len(self._held) > 1 else self._held[0]
+        self._held = []
+        if self._noise is None:
+            # Only frames lying fully inside the signal, as in the one-shot path
+            boot = min(_NOISE_BOOT, max(1, (self._n_in - FRAME_SIZE) // HOP_SIZE + 1))
+            self._noise = np.mean(np.abs(spectrum[:boot]) ** 2, axis=0)
+
+        out, speech = self._subtract(spectrum)
+        out = self._apply_gain(out, speech)
+
+        if final:
+            out = out[:max(0, self._n_in - self._n_out)]
+        self._n_out += len(out)
+        return out.astype(np.float32)
+
+    def _subtract(self, spectrum: np.ndarray):
+        power = np.abs(spectrum) ** 2
+        frame_power = power.mean(axis=1)
+        quiet = frame_power < NOISE_GATE * self._noise.mean()
+
+        clean = np.fft.irfft(_subtract_noise(spectrum, np.sqrt(self._noise)), n=FRAME_SIZE, axis=1)
+        ola = _overlap_add(clean * _WINDOW)
+        wsum = _overlap_add(np.broadcast_to(_WINDOW ** 2, clean.shape))
+        ola[:len(self._tail)] += self._tail
+        wsum[:len(self._wtail)] += self._wtail
+
+        done = len(spectrum) * HOP_SIZE
+        self._tail, self._wtail = ola[done:], wsum[done:]
+        out, wsum = ola[:done], wsum[:done]
+        nonzero = wsum > 1e-8
+        out[nonzero] /= wsum[nonzero]
+
+        # Track the noise floor from frames that look like background only
+        if quiet.any():
+            a = NOISE_ADAPT ** int(quiet.sum())
+            self._noise = a * self._noise + (1 - a) * power[quiet].mean(axis=0)
+        return out, int((~quiet).sum())
+
+    def _apply_gain(self, out: np.ndarray, speech_frames: int) -> np.ndarray:
+        if speech_frames and len(out):
+            ms = float(np.mean(out ** 2))
+            a = GAIN_SMOOTH ** speech_frames
+            self._level = ms if self._level is None else a * self._level + (1 - a) * ms
+        if self._level is None or self._level < 1e-18:
+            return out * self._gain
+
+        target = float(np.clip(TARGET_RMS / np.sqrt(self._level), MIN_GAIN, MAX_GAIN))
+        # Ramp across the block so gain changes never click
+        ramp = np.linspace(self._gain, target, len(out) + 1)[1:]
+        self._gain = target
+        return out * ramp
+
+
+class PayloadCleaner:
+    """
+    Clean a Unity audio payload while it is still being received.
+
+    Accepts bare PCM-16 mono or a WAV whose `fmt ` is PCM-16 mono at
+    SAMPLE_RATE; anything else (other WAV formats, text) deactivates the
+    cleaner and `result()` returns None so the caller can fall back to
+    `process_audio` on the complete payload.
+    """
+
+    _HEADER_LIMIT = 4096    # give up looking for the WAV `data` chunk after this many bytes
+
+    def __init__(self):
+        self.canceller = NoiseCanceller()
+        self._head     = bytearray()
+        self._remain   = None       # PCM bytes still expected; None until the header is resolved
+        self._active   = True
+        self._out      = []
+
+    def feed(self, data) -> None:
+        if not self._active:
+            return
+        if self._remain is None:
+            self._head += data
+            if len(self._head) < 12:
+                return
+            if self._head[:4] == b"RIFF" and self._head[8:12] == b"WAVE":
+                found = _wav_pcm_span(bytes(self._head))
+                if found is None:
+                    if len(self._head) > self._HEADER_LIMIT:
+                        self._active = False
+                    return
+                if found is False:
+                    self._active = False
+                    return
+                offset, size = found
+            else:
+                offset, size = 0, float("inf")
+            data, self._head = bytes(self._head[offset:]), bytearray()
+            self._remain = size
+        if self._remain <= 0:
+            return
+        data = data[:self._remain] if self._remain < len(data) else data
+        self._remain -= len(data)
+        self._out.append(self.canceller.process_pcm(data))
+
+    def result(self):
+        """Cleaned float32 signal for the whole payload, or None if it could not be streamed."""
+        if not self._active or self._remain is None:
+            return None
+        self._out.append(self.canceller.flush())
+        return np.concatenate(self._out)
+
+
+def _wav_pcm_span(head: bytes):
+    """
+    Walk RIFF chunks in `head`.  Returns (data_offset, data_size) when the
+    `data` chunk is reached and the format is streamable, False when the
+    format is not PCM-16 mono at SAMPLE_RATE, or None if more bytes are needed.
+    """
+    pos, fmt_ok = 12, None
+    while pos + 8 <= len(head):
+        cid, size = head[pos:pos + 4], struct.unpack("<I", head[pos + 4:pos + 8])[0]
+        body = pos + 8
+        if cid == b"fmt ":
+            if body + 16 > len(head):
+                return None
+            tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", head[body:body + 16])
+            fmt_ok = tag == 1 and channels == 1 and rate == SAMPLE_RATE and bits == 16
+            if not fmt_ok:
+                return False
+        elif cid == b"data":
+            return (body, size) if fmt_ok else False
+        pos = body + size + (size & 1)
+    return None
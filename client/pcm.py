@@ -0,0 +1,91 @@
+"""
+pcm.py
+------
+Small helpers for moving audio between WAV containers and NumPy buffers.
+
+All in-process audio is carried as mono float32 in [-1, 1] together with
+its sample rate; conversion to PCM-16 only happens at the edges (files,
+sockets).
+
+Public API
+----------
+    read_wav(src)                 -> (samples: np.ndarray, sample_rate: int)
+    read_pcm16(src)               -> (pcm16: bytes, sample_rate: int)
+    write_wav(dst, samples, rate) -> None
+    wav_bytes(samples, rate)      -> bytes
+    to_pcm16(samples)             -> bytes
+    from_pcm16(pcm16)             -> np.ndarray
+"""
+
+import io
+import wave
+import numpy as np
+
+
+def from_pcm16(pcm16: bytes) -> np.ndarray:
+    """Convert raw PCM-16 LE bytes → float32 array in [-1, 1]."""
+    return np.frombuffer(pcm16, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    """Convert float32 array in [-1, 1] → PCM-16 LE bytes (clipped)."""
+    clipped = np.clip(samples, -1.0, 1.0)
+    return (clipped * 32767).astype("<i2").tobytes()
+
+
+def read_wav(src) -> tuple[np.ndarray, int]:
+    """
+    Read a WAV file (path, bytes or file-like) into mono float32.
+
+    8/16/32-bit integer PCM is supported; multi-channel audio is averaged
+    down to mono.
+    """
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        src = io.BytesIO(src)
+    with wave.open(src, "rb") as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def read_pcm16(src) -> tuple[bytes, int]:
+    """Mono PCM-16 LE bytes of a WAV; our own 16-bit mono files are passed through without conversion."""
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        src = io.BytesIO(src)
+    with wave.open(src, "rb") as wf:
+        if wf.getnchannels() == 1 and wf.getsampwidth() == 2:
+            return wf.readframes(wf.getnframes()), wf.getframerate()
+    if hasattr(src, "seek"):
+        src.seek(0)
+    samples, rate = read_wav(src)
+    return to_pcm16(samples), rate
+
+
+def write_wav(dst, samples: np.ndarray, rate: int) -> None:
+    """Write mono float32 `samples` as a PCM-16 WAV to a path or file-like."""
+    with wave.open(dst, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(int(rate))
+        wf.writeframes(to_pcm16(samples))
+
+
+def wav_bytes(samples: np.ndarray, rate: int) -> bytes:
+    """Encode mono float32 `samples` as an in-memory PCM-16 WAV file."""
+    buf = io.BytesIO()
+    write_wav(buf, samples, rate)
+    return buf.getvalue()
@@ -0,0 +1,125 @@
+"""
+pipeline.py
+-----------
+Staged request scheduler for the bridge.
+
+Each Unity turn passes through a fixed sequence of stages (STT -> LLM ->
+TTS -> respond).  Every stage has its own bounded queue and worker
+threads, so one turn can be transcribed while the previous one is still
+being voiced.  Inner queues apply back-pressure (a stage waits for room
+downstream); when that pressure reaches the entry queue, new turns are
+shed with an explicit rejection instead of piling up or being dropped.
+
+Public API
+----------
+    pipe = StagedPipeline([("stt", fn, 2), ("llm", fn, 2), ("respond", fn, 1)], depth=4)
+    if not pipe.submit(job, timeout=0.0):
+        ...                                   # shed: tell the client we're busy
+    pipe.stats() -> dict
+    pipe.shutdown()
+
+    A stage function takes the Job and returns True to pass it on, or False
+    to send it straight to the last stage.  If it raises, the exception is
+    stored on `job.error` and the job also goes straight to the last stage,
+    which always runs (it is where responses are sent and sockets closed).
+"""
+
+import logging
+import queue
+import threading
+import time
+
+log = logging.getLogger("pipeline")
+
+
+class Job:
+    """One unit of work; subclasses carry the per-stage inputs and results."""
+
+    def __init__(self):
+        self.error: Exception | None = None
+        self.created = time.perf_counter()
+        # (stage name, seconds queued, seconds running)
+        self.timings: list[tuple[str, float, float]] = []
+
+    def timing_summary(self) -> str:
+        return ", ".join(f"{name} {run:.2f}s (+{wait:.2f}s queued)" for name, wait, run in self.timings)
+
+
+class _Stage:
+    def __init__(self, name: str, fn, workers: int, depth: int):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.q: queue.Queue = queue.Queue(maxsize=max(1, int(depth)))
+        self.processed = 0
+        self.failed = 0
+
+
+class StagedPipeline:
+    """Bounded queue plus worker threads per stage; jobs flow from the first stage to the last."""
+
+    def __init__(self, stages, depth: int = 4):
+        if not stages:
+            raise ValueError("StagedPipeline needs at least one stage")
+        self._stages = [_Stage(name, fn, workers, depth) for name, fn, workers in stages]
+        self._lock = threading.Lock()
+        self._running = True
+        self.shed = 0
+        for i, stage in enumerate(self._stages):
+            for w in range(stage.workers):
+                threading.Thread(target=self._worker, args=(i,), name=f"pipe-{stage.name}-{w}",
+                                 daemon=True).start()
+
+    def submit(self, job: Job, timeout: float = 0.0) -> bool:
+        """Queue `job` at the first stage; False if it stayed full for `timeout` seconds (the job was shed)."""
+        item = (job, time.perf_counter())
+        try:
+            if timeout > 0:
+                self._stages[0].q.put(item, timeout=timeout)
+            else:
+                self._stages[0].q.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.shed += 1
+            return False
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "shed": self.shed,
+                "stages": {s.name: {"queued": s.q.qsize(), "processed": s.processed, "failed": s.failed}
+                           for s in self._stages},
+            }
+
+    def shutdown(self):
+        # Workers are daemons; jobs still queued are abandoned along with the process
+        self._running = False
+
+    def _worker(self, idx: int):
+        stage = self._stages[idx]
+        last = len(self._stages) - 1
+        while self._running:
+            try:
+                job, queued_at = stage.q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            started = time.perf_counter()
+            try:
+                forward = bool(stage.fn(job))
+            except Exception as e:
+                log.error("Stage %s failed: %s", stage.name, e)
+                job.error = e
+                forward = False
+                with self._lock:
+                    stage.failed += 1
+            job.timings.append((stage.name, started - queued_at, time.perf_counter() - started))
+            with self._lock:
+                stage.processed += 1
+
+            if idx == last:
+                continue
+            nxt = self._stages[idx + 1] if forward else self._stages[last]
+            # Blocking put: a slow stage holds up the one before it rather than growing without bound
+            nxt.q.put((job, time.perf_counter()))
@@ -0,0 +1,245 @@
+"""
+player.py
+---------
+Local playback of synthesized speech through one persistent output stream.
+
+`playsound` opened the audio device and re-read a WAV from disk for every
+sentence, left a gap between sentences while it did so, and could not be
+interrupted.  `AudioPlayer` keeps a single stream open for the life of
+the bridge and feeds it from an in-memory queue of float32 buffers:
+
+    * a feeder thread writes the queue to the sink in short blocks, so
+      consecutive sentences play back to back without gaps;
+    * `cancel()` (barge-in) drops everything queued and cuts the current
+      sentence off at the next block.  The feeder thread, the only thread
+      that ever touches the sink, then flushes it (PortAudio streams are
+      not thread-safe), which also silences audio already handed to the
+      device.  Skipping sentences that were requested before the
+      cancel but only synthesized after it is the caller's job.
+
+Sinks
+-----
+    device : sounddevice OutputStream (optional dependency)
+    null   : discards audio; with realtime=True it sleeps as long as the
+             audio would have played, for headless timing tests
+    file   : appends everything played to one WAV file (headless capture)
+
+Public API
+----------
+    player = AudioPlayer(open_sink("device"), rate=48000)
+    player.play(samples, rate)
+    player.cancel()                      # barge-in
+    player.wait_idle(timeout) -> bool
+    player.close()
+"""
+
+import collections
+import logging
+import threading
+import time
+
+import numpy as np
+
+log = logging.getLogger("player")
+
+SINKS = ("device", "null", "file")
+
+
+class Sink:
+    """Base class; subclasses write mono float32 blocks to wherever audio goes."""
+
+    name = ""
+
+    def open(self, rate: int):
+        self.rate = rate
+
+    def write(self, block: np.ndarray):
+        raise NotImplementedError
+
+    def flush(self):
+        """Drop audio already handed to the sink but not yet heard (barge-in). Called from the feeder thread."""
+
+    def close(self):
+        pass
+
+
+class DeviceSink(Sink):
+    """The default output device through one sounddevice stream that stays open."""
+
+    name = "device"
+
+    def __init__(self, device=None, latency="low"):
+        import sounddevice  # noqa: F401  (fail at construction, not on the first sentence)
+        self.device = device
+        self.latency = latency
+        self._stream = None
+
+    def open(self, rate: int):
+        import sounddevice as sd
+        super().open(rate)
+        self._stream = sd.OutputStream(samplerate=rate, channels=1, dtype="float32",
+                                       device=self.device, latency=self.latency)
+        self._stream.start()
+
+    def write(self, block: np.ndarray):
+        # Blocking write: paces the feeder at playback speed; an empty queue plays silence
+        self._stream.write(block.reshape(-1, 1))
+
+    def flush(self):
+        self._stream.abort()
+        self._stream.start()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+class NullSink(Sink):
+    """Discards audio, optionally at real-time speed."""
+
+    name = "null"
+
+    def __init__(self, realtime: bool = False):
+        self.realtime = realtime
+        self.frames = 0
+
+    def write(self, block: np.ndarray):
+        self.frames += len(block)
+        if self.realtime:
+            time.sleep(len(block) / self.rate)
+
+
+class FileSink(Sink):
+    """Everything played, gaps excluded, as one PCM-16 WAV."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._wav = None
+        self.frames = 0
+
+    def open(self, rate: int):
+        import wave
+        super().open(rate)
+        self._wav = wave.open(self.path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(rate)
+
+    def write(self, block: np.ndarray):
+        from pcm import to_pcm16
+        self._wav.writeframes(to_pcm16(block))
+        self.frames += len(block)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+def open_sink(spec: str) -> Sink:
+    """"device", "null", "null:realtime" or "file:<path>"."""
+    kind, _, arg = spec.partition(":")
+    kind = kind.lower()
+    if kind == "device":
+        return DeviceSink(arg or None)
+    if kind == "null":
+        return NullSink(realtime=arg == "realtime")
+    if kind == "file":
+        if not arg:
+            raise ValueError("file sink needs a path: file:<path>")
+        return FileSink(arg)
+    raise ValueError(f"Unknown playback sink {spec!r} (expected one of {', '.join(SINKS)})")
+
+
+class AudioPlayer:
+    """One open sink fed from a queue of float32 buffers by a single feeder thread."""
+
+    def __init__(self, sink: Sink, rate: int = 48000, block_ms: int = 20):
+        self.sink = sink
+        self.rate = int(rate)
+        self.block = max(1, self.rate * block_ms // 1000)
+        self.played = 0
+        self.cancelled = 0
+        self._q: collections.deque = collections.deque()
+        self._cv = threading.Condition()
+        self._busy = False
+        # Set by cancel(); the feeder stops the current buffer and flushes the sink itself
+        self._flush = False
+        self._running = True
+        sink.open(self.rate)
+        self._thread = threading.Thread(target=self._feeder, name="player", daemon=True)
+        self._thread.start()
+
+    def play(self, samples: np.ndarray, rate: int):
+        """Queue a buffer behind whatever is playing."""
+        if rate != self.rate:
+            from resample import resample
+            samples = resample(samples, rate, self.rate)
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        with self._cv:
+            self._q.append(samples)
+            self._cv.notify()
+
+    def cancel(self) -> int:
+        """Barge-in: stop the current buffer and drop queued ones; returns how many were dropped."""
+        with self._cv:
+            dropped = len(self._q) + (1 if self._busy else 0)
+            self._q.clear()
+            self.cancelled += dropped
+            # Even with nothing queued, the last buffer may still be in the device's own buffer
+            self._flush = True
+            self._cv.notify_all()
+        return dropped
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until the queue has drained; False on timeout."""
+        with self._cv:
+            return self._cv.wait_for(lambda: not self._q and not self._busy and not self._flush, timeout)
+
+    def close(self):
+        with self._cv:
+            self._running = False
+            self._q.clear()
+            self._cv.notify_all()
+        self._thread.join(timeout=2)
+        self.sink.close()
+
+    def _feeder(self):
+        while True:
+            with self._cv:
+                self._cv.wait_for(lambda: self._q or self._flush or not self._running)
+                if not self._running:
+                    return
+                if self._flush:
+                    self._flush = False
+                    samples = None
+                else:
+                    samples = self._q.popleft()
+                    self._busy = True
+            if samples is None:
+                self._flush_sink()
+                continue
+            try:
+                for start in range(0, len(samples), self.block):
+                    if self._flush or not self._running:
+                        break
+                    self.sink.write(samples[start:start + self.block])
+                else:
+                    self.played += 1
+            except Exception as e:
+                log.error("Playback failed on %s sink: %s", self.sink.name, e)
+            finally:
+                with self._cv:
+                    self._busy = False
+                    self._cv.notify_all()
+
+    def _flush_sink(self):
+        try:
+            self.sink.flush()
+        except Exception as e:
+            log.warning("Could not flush %s sink: %s", self.sink.name, e)
+        with self._cv:
+            self._cv.notify_all()
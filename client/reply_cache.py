@@ -0,0 +1,87 @@
+"""
+reply_cache.py
+--------------
+Exact-match cache of finished replies, in front of the Rust server.
+
+Players repeat themselves ("hi Monika", "what's up", test phrases), and
+each repeat is a full LLM round trip followed by TTS.  A hit hands back
+the earlier reply text together with the audio that was already
+synthesized for it.
+
+Keys are the recognized text, normalized the way Whisper output tends to
+wobble between takes: NFKC, case-folded, punctuation dropped, whitespace
+collapsed ("What's up?" == "what's up").  An optional `context` string
+(e.g. a mood bucket) is folded into the key so replies given in one
+state are not replayed in another.
+
+Entries expire after `ttl` seconds and the least recently used one is
+dropped once `max_entries` is reached.
+
+Public API
+----------
+    cache = ReplyCache(ttl=600, max_entries=256)
+    cache.get(question, context="") -> (text, audio) | None
+    cache.put(question, text, audio, context="")
+    cache.stats() -> dict
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_PUNCT = re.compile(r"[^\w\s]")
+_WS = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold().replace("’", "'")
+    # Apostrophes stay so "its" and "it's" remain different questions
+    text = _PUNCT.sub(lambda m: m.group() if m.group() == "'" else " ", text)
+    return _WS.sub(" ", text).strip()
+
+
+class ReplyCache:
+    """TTL + LRU map from normalized question (and context) to the reply given for it. Thread-safe."""
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 256):
+        self.ttl = float(ttl)
+        self.max_entries = max(1, int(max_entries))
+        # (normalized question, context) -> (text, audio, stored at)
+        self._entries: OrderedDict[tuple[str, str], tuple[str, str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, question: str, context: str = "") -> tuple[str, str] | None:
+        key = (normalize_question(question), context)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, question: str, text: str, audio: str, context: str = ""):
+        key = (normalize_question(question), context)
+        if not key[0] or not text:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (text, audio, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "expired": self.expired}
@@ -0,0 +1,155 @@
+"""
+resample.py
+-----------
+Vectorised polyphase resampling shared by the bridge and the Whisper server.
+
+Algorithm:
+  - Rates are reduced to an integer ratio up/down (gcd).
+  - One windowed-sinc (Kaiser) low-pass prototype is designed per ratio,
+    cut at ROLLOFF × the lower Nyquist, and split into `up` polyphase
+    sub-filters.  Filter banks are cached per (up, down) pair, so the
+    design cost is paid once per rate pair per process.
+  - Every output sample is a dot product of one sub-filter with a window
+    of input samples.  All outputs that share a sub-filter are computed as
+    one strided-view × vector product, so the Python-level loop runs once
+    per branch rather than once per sample.
+
+Streaming:
+    `Resampler` carries the input history and output phase between calls,
+    so audio can be fed in arbitrary chunks and the concatenated result
+    matches resampling the whole signal at once (to float32 rounding).
+
+Public API
+----------
+    resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray
+
+    rs = Resampler(src_rate, dst_rate)
+    out = rs.process(chunk)       # any number of times
+    out = rs.flush()              # once, at end of stream
+"""
+
+from functools import lru_cache
+from math import gcd
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Tuneable constants
+# ---------------------------------------------------------------------------
+
+ZERO_CROSSINGS = 16        # sinc lobes on each side, at the lower of the two rates
+ROLLOFF        = 0.945     # pass-band edge as a fraction of the lower Nyquist
+KAISER_BETA    = 8.6       # ~80 dB stop-band attenuation
+
+
+# ---------------------------------------------------------------------------
+# Filter design
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=32)
+def _filter_bank(up: int, down: int) -> tuple[np.ndarray, int]:
+    """
+    Return (bank, delay) for the ratio up/down.
+
+    bank[p] holds the taps of polyphase branch p, reversed so that it can
+    be dotted directly with an ascending window of input samples.  `delay`
+    is the prototype's group delay in up-sampled ticks.
+    """
+    factor = max(up, down)
+    n_taps = 2 * ZERO_CROSSINGS * factor + 1
+    cutoff = ROLLOFF / factor
+    n = np.arange(n_taps) - (n_taps - 1) / 2
+    proto = cutoff * np.sinc(cutoff * n) * np.kaiser(n_taps, KAISER_BETA) * up
+
+    per_phase = -(-n_taps // up)
+    padded = np.zeros(per_phase * up)
+    padded[:n_taps] = proto
+    bank = padded.reshape(per_phase, up).T[:, ::-1]
+    bank = np.ascontiguousarray(bank, dtype=np.float32)
+    bank.setflags(write=False)
+    return bank, (n_taps - 1) // 2
+
+
+# ---------------------------------------------------------------------------
+# Streaming resampler
+# ---------------------------------------------------------------------------
+
+class Resampler:
+    """Stateful polyphase resampler for mono float32 audio fed in chunks."""
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        g = gcd(int(src_rate), int(dst_rate))
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        self.up = self.dst_rate // g
+        self.down = self.src_rate // g
+        self._bank, self._delay = _filter_bank(self.up, self.down)
+        self._taps = self._bank.shape[1]
+        # Input history; _buf[0] is absolute input index _buf_start (negative = zero pre-roll)
+        self._buf = np.zeros(self._taps - 1, dtype=np.float32)
+        self._buf_start = -(self._taps - 1)
+        self._n_in = 0
+        self._n_out = 0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Feed `chunk` and return every output sample that is now fully determined."""
+        chunk = np.asarray(chunk, dtype=np.float32).ravel()
+        if self.up == self.down:
+            self._n_in += len(chunk)
+            self._n_out += len(chunk)
+            return chunk.copy()
+        if len(chunk):
+            self._buf = np.concatenate((self._buf, chunk))
+            self._n_in += len(chunk)
+        return self._emit(self._n_in, None)
+
+    def flush(self) -> np.ndarray:
+        """Drain the filter tail; the total output length is ceil(n_in × dst / src)."""
+        total = -(-self._n_in * self.up // self.down)
+        if self.up == self.down or self._n_out >= total:
+            return np.zeros(0, dtype=np.float32)
+        self._buf = np.concatenate((self._buf, np.zeros(self._taps, dtype=np.float32)))
+        return self._emit(self._n_in + self._taps, total)
+
+    def _emit(self, available: int, limit) -> np.ndarray:
+        up, down, taps = self.up, self.down, self._taps
+        # Output j needs input index (j*down + delay) // up; only emit those already received.
+        end = (available * up - 1 - self._delay) // down + 1
+        if limit is not None:
+            end = min(end, limit)
+        if end <= self._n_out:
+            return np.zeros(0, dtype=np.float32)
+
+        # Outputs j, j+up, j+2*up, ... share one polyphase branch and their input
+        # windows advance by exactly `down` samples, so each branch is a single
+        # strided (copy-free) view times one filter vector.
+        windows = np.lib.stride_tricks.sliding_window_view(self._buf, taps)
+        n = end - self._n_out
+        out = np.empty(n, dtype=np.float32)
+        for r in range(min(up, n)):
+            t = (self._n_out + r) * down + self._delay
+            first = t // up - (taps - 1) - self._buf_start
+            count = -(-(n - r) // up)
+            out[r::up] = windows[first:first + down * (count - 1) + 1:down] @ self._bank[t % up]
+        self._n_out = end
+
+        # Drop input that no future output can reach.
+        keep_from = (end * down + self._delay) // up - (taps - 1)
+        drop = keep_from - self._buf_start
+        if drop > 0:
+            self._buf = self._buf[drop:]
+            self._buf_start = keep_from
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample a whole mono float32 signal from src_rate to dst_rate."""
+    samples = np.asarray(samples, dtype=np.float32)
+    if int(src_rate) == int(dst_rate):
+        return samples
+    rs = Resampler(src_rate, dst_rate)
+    head = rs.process(samples)
+    return np.concatenate((head, rs.flush()))
@@ -0,0 +1,101 @@
+"""
+rvc_pool.py
+-----------
+RVC voice conversion spread over worker processes.
+
+`RVCEngine` converts one utterance at a time: it is CPU-bound, holds its
+own lock, and shares the GIL with the rest of the bridge.  `RVCPool`
+starts N worker processes instead; each one
+
+    * pins its torch intra-op thread count (and the OpenMP/MKL pools)
+      so N workers do not oversubscribe the cores,
+    * loads HuBERT, the voice checkpoint and the pitch extractor once,
+      in its initializer, and keeps them resident,
+    * converts (and optionally resamples) float32 arrays sent to it.
+
+Work is submitted per sentence and comes back as futures; callers that
+need the results in order simply consume the futures in submission order.
+Workers use the "spawn" start method on every platform: torch does not
+survive fork reliably, and Windows has nothing else.
+
+Public API
+----------
+    pool = RVCPool(model_path, workers=2, threads=2, work_dir=None)
+    pool.warm()                                          # wait until every worker has loaded the model
+    fut = pool.submit(samples, rate, out_rate=48000)     # -> Future[(float32 samples, rate)]
+    pool.close()
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+log = logging.getLogger("rvc-pool")
+
+_engine = None  # the worker process's resident RVCEngine
+_warm_barrier = None  # shared by all workers; see RVCPool.warm
+
+
+def _init_worker(model_path: str, work_dir: str | None, threads: int, barrier):
+    global _engine, _warm_barrier
+    _warm_barrier = barrier
+    if threads > 0:
+        # Before torch is imported, so its OpenMP pool is sized once and never grows
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ[var] = str(threads)
+        import torch
+        torch.set_num_threads(threads)
+    from voice_engine import RVCEngine
+    _engine = RVCEngine(model_path, work_dir=work_dir)
+    _engine.load()
+
+
+def _convert(samples, rate: int, out_rate: int):
+    samples, rate = _engine.convert(samples, rate)
+    if out_rate and out_rate != rate:
+        from resample import resample
+        samples, rate = resample(samples, rate, out_rate), out_rate
+    return samples, rate
+
+
+def _ready(timeout: float) -> int:
+    # Holds this worker until every worker is holding one of these calls, so N answers
+    # can only come from N distinct workers that have all finished their initializer
+    _warm_barrier.wait(timeout)
+    return os.getpid()
+
+
+class RVCPool:
+    """Worker processes with a resident RVC model each; `submit` returns a Future."""
+
+    def __init__(self, model_path: str, workers: int = 2, threads: int = 0, work_dir: str | None = None):
+        self.workers = max(1, int(workers))
+        self.threads = int(threads) if threads > 0 else max(1, (os.cpu_count() or 1) // self.workers)
+        ctx = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(model_path, work_dir, self.threads, ctx.Barrier(self.workers)),
+        )
+
+    def warm(self, timeout: float = 600.0):
+        """Start every worker and wait until all of them have loaded the model; raises if one fails to."""
+        t0 = time.perf_counter()
+        futures = [self._executor.submit(_ready, timeout) for _ in range(self.workers)]
+        pids = {f.result() for f in futures}
+        if len(pids) != self.workers:
+            raise RuntimeError(f"only {len(pids)} of {self.workers} RVC workers came up")
+        log.info("RVC pool ready in %.2fs: %d worker(s) x %d thread(s)",
+                 time.perf_counter() - t0, self.workers, self.threads)
+
+    def submit(self, samples, rate: int, out_rate: int = 0) -> Future:
+        return self._executor.submit(_convert, samples, rate, out_rate)
+
+    def convert(self, samples, rate: int, out_rate: int = 0):
+        return self.submit(samples, rate, out_rate).result()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
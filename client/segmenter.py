@@ -0,0 +1,98 @@
+"""
+segmenter.py
+------------
+Incremental sentence / clause segmenter for streamed LLM replies.
+
+The Rust server streams the reply as a sequence of small text fragments
+(often a single token).  Voicing can begin as soon as the first sentence
+is complete, so fragments are buffered here and cut at sentence
+boundaries.  Very long run-on sentences are additionally cut at clause
+punctuation (, ; : —) so that time-to-first-audio stays bounded.
+
+A boundary is only accepted once the character *after* the punctuation
+has arrived (whitespace), because the next fragment may still extend
+the token ("3." -> "3.14", "?" -> "?!").
+
+Public API
+----------
+    seg = SentenceSegmenter()
+    for fragment in stream:
+        for clause in seg.feed(fragment):
+            speak(clause)
+    for clause in seg.flush():
+        speak(clause)
+"""
+
+import re
+
+# ---------------------------------------------------------------------------
+# Tuneable constants
+# ---------------------------------------------------------------------------
+
+MIN_CLAUSE_CHARS = 2     # shorter pieces are merged into the next clause
+MAX_CLAUSE_CHARS = 160   # above this, also cut at , ; : —
+
+# Sentence end: terminal punctuation run, optional closing quotes/brackets,
+# then whitespace.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]”’]*(?=\s)")
+# Clause end used only for over-long sentences.
+_CLAUSE_END = re.compile(r"[,;:—](?=\s)")
+
+# Common abbreviations that should not terminate a sentence.
+_ABBREVIATIONS = frozenset({
+    "mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e.",
+    "prof.", "sr.", "jr.", "no.",
+})
+
+
+def _ends_with_abbreviation(text: str) -> bool:
+    words = text.split()
+    return bool(words) and words[-1].lower() in _ABBREVIATIONS
+
+
+def _is_clause(text: str) -> bool:
+    # Lone punctuation or a stray letter stays attached to what follows.
+    text = text.strip()
+    return len(text) >= MIN_CLAUSE_CHARS and any(c.isalnum() for c in text)
+
+
+class SentenceSegmenter:
+    """Buffer streamed text and emit complete clauses as they close."""
+
+    def __init__(self, max_clause_chars: int = MAX_CLAUSE_CHARS):
+        self._buf = ""
+        self._max = max_clause_chars
+
+    def feed(self, fragment: str) -> list[str]:
+        """Append `fragment` and return every clause completed by it."""
+        if not fragment:
+            return []
+        self._buf += fragment
+        out = []
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                break
+            out.append(self._buf[:cut].strip())
+            self._buf = self._buf[cut:].lstrip()
+        return out
+
+    def flush(self) -> list[str]:
+        """Return whatever is left in the buffer as a final clause."""
+        clause = self._buf.strip()
+        self._buf = ""
+        if any(c.isalnum() for c in clause):
+            return [clause]
+        return []
+
+    def _next_cut(self):
+        for m in _SENTENCE_END.finditer(self._buf):
+            head = self._buf[:m.end()]
+            if _is_clause(head) and not _ends_with_abbreviation(head):
+                return m.end()
+        if len(self._buf) > self._max:
+            cuts = [m.end() for m in _CLAUSE_END.finditer(self._buf, 0, self._max)
+                    if _is_clause(self._buf[:m.end()])]
+            if cuts:
+                return cuts[-1]
+        return None
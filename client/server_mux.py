@@ -0,0 +1,247 @@
+"""
+server_mux.py
+-------------
+Persistent, multiplexed connections from the bridge to the Rust server.
+
+The legacy protocol is one question per TCP connection: connect, send
+`u32 len | question`, read fragment frames until a zero-length frame,
+close.  In multiplexed mode a connection stays open and carries any
+number of requests, several at once if need be:
+
+    client -> server : u32 LE "MUX1" magic
+                       u32 len | session id                 (hello, once)
+                       u32 request_id | u32 len | question  (per request, id != 0)
+    server -> client : u32 0 | u32 len | session id         (hello ack)
+                       u32 request_id | u32 len | fragment  (0-length ends the request)
+
+The session id is chosen by the bridge and stays the same across
+reconnects, so the server's mood engine and session pool see one stable
+client instead of a new ephemeral port every turn.
+
+Public API
+----------
+    pool = MuxPool(host, port, size=2, session_id="unity-bridge@host")
+    for fragment in pool.stream(question):
+        ...
+    pool.close()
+
+If the server answers the hello with anything but an ack (an older build
+replies with a "question too long" error), `stream` raises MuxUnsupported
+and the caller falls back to one connection per question.  A timeout or
+reset during the hello is an ordinary, transient ConnectionError.
+
+A question is retried on a fresh connection only if it was never written
+(MuxNotSent); once it has gone out, the server may already be answering
+it, and asking again would run the LLM twice.
+"""
+
+import itertools
+import logging
+import queue
+import socket
+import struct
+import threading
+
+from framing import TextFrames, recv_exact, send_vectored
+
+log = logging.getLogger("server-mux")
+
+MUX_MAGIC = struct.pack("<I", int.from_bytes(b"MUX1", "little"))
+MAX_FRAME = 32 * 1024 * 1024
+
+_CLOSED = object()
+
+
+class MuxUnsupported(ConnectionError):
+    """The server rejected the multiplexing hello."""
+
+
+class MuxNotSent(ConnectionError):
+    """The question was never written to the server, so it is safe to send it again."""
+
+
+class MuxConnection:
+    """One persistent connection; a reader thread routes reply frames to the request waiting on them."""
+
+    def __init__(self, host: str, port: int, session_id: str, timeout: float, hello_timeout: float = 3.0):
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._streams: dict[int, queue.Queue] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self.alive = True
+
+        self._sock = socket.create_connection((host, port), timeout=hello_timeout)
+        try:
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = session_id.encode("utf-8")
+            send_vectored(self._sock, (MUX_MAGIC, struct.pack("<I", len(session)), session))
+            ack = recv_exact(self._sock, 8)
+            if ack is None:
+                raise ConnectionError(f"{host}:{port} closed the connection during the hello")
+            if struct.unpack("<I", ack[:4])[0] != 0:
+                # A legacy server reads the magic as a question length and answers with an error frame
+                raise MuxUnsupported(f"{host}:{port} answered the hello with a reply frame, not an ack")
+            ack_body = recv_exact(self._sock, struct.unpack("<I", ack[4:])[0])
+            if ack_body is None:
+                raise ConnectionError(f"{host}:{port} closed the connection during the hello")
+        except BaseException:
+            self._sock.close()
+            raise
+        self.session_id = bytes(ack_body).decode("utf-8", errors="replace")
+        self._sock.settimeout(None)
+        threading.Thread(target=self._reader, name="server-mux", daemon=True).start()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._streams)
+
+    def stream(self, question: str):
+        """
+        Yield reply fragments for `question`; raises ConnectionError/TimeoutError on failure,
+        MuxNotSent if the question never went out.
+        """
+        rid = next(self._ids) % 0xFFFFFFFF + 1  # 0 is reserved for the hello ack
+        replies: queue.Queue = queue.Queue()
+        with self._lock:
+            if not self.alive:
+                raise MuxNotSent("server connection closed")
+            self._streams[rid] = replies
+        try:
+            body = question.encode("utf-8")
+            try:
+                with self._send_lock:
+                    send_vectored(self._sock, (struct.pack("<II", rid, len(body)), body))
+            except OSError as e:
+                # A partial frame leaves the stream out of step; the server drops it with the connection
+                self.close()
+                raise MuxNotSent(f"could not send question: {e}") from e
+            text = TextFrames()
+            while True:
+                try:
+                    frame = replies.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"no reply from server for {self.timeout:.0f}s") from None
+                if frame is _CLOSED:
+                    raise ConnectionError("Server closed connection before response")
+                if not frame:
+                    tail = text.flush()
+                    if tail:
+                        yield tail
+                    return
+                fragment = text.feed(frame)
+                if fragment:
+                    yield fragment
+        finally:
+            with self._lock:
+                self._streams.pop(rid, None)
+
+    def _reader(self):
+        try:
+            while True:
+                header = recv_exact(self._sock, 8)
+                if header is None:
+                    break
+                rid, length = struct.unpack("<II", header)
+                if length > MAX_FRAME:
+                    raise ValueError(f"Invalid frame length: {length}")
+                body = recv_exact(self._sock, length) if length else b""
+                if body is None:
+                    break
+                with self._lock:
+                    target = self._streams.get(rid)
+                if target is not None:
+                    target.put(body)
+        except (OSError, ValueError) as e:
+            log.warning("Server connection lost: %s", e)
+        finally:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if not self.alive:
+                return
+            self.alive = False
+            waiting = list(self._streams.values())
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        for q in waiting:
+            q.put(_CLOSED)
+
+
+class MuxPool:
+    """A few warm MuxConnections; each request goes to the least busy one, dead ones are replaced."""
+
+    def __init__(self, host: str, port: int, size: int = 2, session_id: str = "", timeout: float = 310.0):
+        self.host = host
+        self.port = port
+        self.size = max(1, int(size))
+        self.session_id = session_id
+        self.timeout = timeout
+        self._conns: list[MuxConnection] = []
+        self._opening = 0  # connections being opened outside the lock; they count against `size`
+        self._lock = threading.Lock()
+
+    def _open(self) -> MuxConnection:
+        """Connect and say hello without holding the lock, then add the connection. The caller reserved the slot."""
+        try:
+            conn = MuxConnection(self.host, self.port, self.session_id, self.timeout)
+        except BaseException:
+            with self._lock:
+                self._opening -= 1
+            raise
+        with self._lock:
+            self._opening -= 1
+            self._conns.append(conn)
+            log.info("Opened server connection %d/%d (session %r)", len(self._conns), self.size, conn.session_id)
+        return conn
+
+    def _acquire(self) -> MuxConnection:
+        with self._lock:
+            self._conns = [c for c in self._conns if c.alive]
+            idle = [c for c in self._conns if c.in_flight == 0]
+            if idle:
+                return idle[0]
+            # With no live connection at all, open one rather than wait for another turn's connect
+            if self._conns and len(self._conns) + self._opening >= self.size:
+                return min(self._conns, key=lambda c: c.in_flight)
+            self._opening += 1
+        return self._open()
+
+    def warm(self):
+        """Open connections up to the pool size ahead of the first request."""
+        with self._lock:
+            self._conns = [c for c in self._conns if c.alive]
+            missing = max(0, self.size - len(self._conns) - self._opening)
+            self._opening += missing
+        try:
+            while missing:
+                missing -= 1
+                self._open()
+        finally:
+            with self._lock:
+                self._opening -= missing  # slots reserved for connections never attempted
+
+    def stream(self, question: str):
+        """Yield reply fragments; a question that could not be sent on a dead connection is retried once."""
+        for attempt in (0, 1):
+            conn = self._acquire()
+            try:
+                yield from conn.stream(question)
+                return
+            except MuxNotSent as e:
+                if attempt:
+                    raise
+                log.info("Server connection went stale (%s); retrying on a fresh one", e)
+            except ConnectionError:
+                # The question went out; the server may be answering it, so it is not asked again
+                conn.close()
+                raise
+
+    def close(self):
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for c in conns:
+            c.close()
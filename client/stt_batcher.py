@@ -0,0 +1,98 @@
+"""
+stt_batcher.py
+--------------
+Dynamic micro-batching for the Whisper server.
+
+Flask handles each /recognize call on its own thread.  Instead of every
+thread calling the model independently (and serialising on it), request
+threads `submit` their audio here and block on a Future.  One scheduler
+thread collects requests until either MAX_BATCH are waiting or the
+oldest one has waited MAX_WAIT_MS, runs a single batched pass, and fans
+the results back out.
+
+Public API
+----------
+    batcher = MicroBatcher(run_batch, max_batch=8, max_wait_ms=30)
+    result = batcher.submit(item).result()
+    batcher.shutdown()
+
+    `run_batch(items: list) -> list` must return one result per item, in
+    order.  If it raises, every request in that batch receives the error.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+log = logging.getLogger("stt-batcher")
+
+
+class MicroBatcher:
+    """Collect concurrent requests into batches for a single worker thread."""
+
+    def __init__(self, run_batch, max_batch: int = 8, max_wait_ms: float = 30.0):
+        self._run_batch = run_batch
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._q: queue.Queue = queue.Queue()
+        self._running = True
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._worker, name="stt-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        fut: Future = Future()
+        self._q.put((item, fut))
+        return fut
+
+    def shutdown(self):
+        self._running = False
+        self._q.put(None)
+        self._thread.join(timeout=3)
+
+    def _collect(self):
+        first = self._q.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                nxt = self._q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if nxt is None:
+                self._running = False
+                break
+            batch.append(nxt)
+        return batch
+
+    def _worker(self):
+        while self._running:
+            batch = self._collect()
+            if batch is None:
+                break
+            items = [item for item, _ in batch]
+            t0 = time.perf_counter()
+            try:
+                results = self._run_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"run_batch returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                log.error("Batch of %d failed: %s", len(items), e)
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            log.info("Ran batch of %d in %.3fs (avg batch %.2f)",
+                     len(items), time.perf_counter() - t0, self.items / self.batches)
+            for (_, fut), res in zip(batch, results):
+                fut.set_result(res)
@@ -0,0 +1,291 @@
+"""
+stt_ipc.py
+----------
+Local IPC transport between the bridge and the Whisper server.
+
+When the bridge spawns stt_server.py itself, both processes are on the
+same host, so HTTP (connection setup, multipart/headers, Flask's dev
+server) is pure overhead.  This module carries the same request over a
+persistent stream socket with length-prefixed frames:
+
+    request  : u32 LE header_len | JSON header | u32 LE body_len | samples
+    response : u32 LE len | JSON result (same fields as /recognize)
+
+The header is {"rate": int, "format": "f32le" | "s16le", "source": str}.
+Any number of requests may be sent on one connection, one at a time.
+
+Addresses
+---------
+    "/path/to/socket"      Unix domain socket (default where AF_UNIX exists;
+                           the default lives in a private per-run directory)
+    "tcp:127.0.0.1:5002"   loopback TCP fallback (e.g. Windows builds of
+                           Python without AF_UNIX)
+
+Public API
+----------
+    default_address() -> str
+    remove_address(address)                 # delete a Unix socket and default_address()'s directory
+    IPCServer(address, handler).start()     # handler(body, rate, fmt, source) -> dict
+    IPCClient(address).recognize(samples, rate, source) -> dict
+    await AsyncIPCClient(address).recognize(samples, rate, source) -> dict
+    IPCNotSent                               # raised when the request never reached the server
+
+A failure after the request went out is raised as-is and must not be
+retried elsewhere: the server may already be transcribing it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import select
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import numpy as np
+
+from framing import recv_frame, send_frames
+
+log = logging.getLogger("stt-ipc")
+
+MAX_HEADER = 64 * 1024
+MAX_BODY = 64 * 1024 * 1024
+
+
+_private_dirs: set[str] = set()
+
+
+def default_address() -> str:
+    if hasattr(socket, "AF_UNIX"):
+        # mkdtemp: a fresh 0700 directory, so no other user can predict, pre-create or reach the socket
+        directory = tempfile.mkdtemp(prefix="monika-stt-")
+        _private_dirs.add(directory)
+        return os.path.join(directory, "stt.sock")
+    return "tcp:127.0.0.1:5002"
+
+
+def remove_address(address: str):
+    """Delete the socket at a Unix address (nothing else), and its directory if default_address() made it."""
+    family, target = _parse(address)
+    if family != socket.AF_UNIX:
+        return
+    _remove_socket(target)
+    directory = os.path.dirname(target)
+    if directory in _private_dirs:
+        _private_dirs.discard(directory)
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+
+def _remove_socket(path: str):
+    try:
+        if stat.S_ISSOCK(os.lstat(path).st_mode):
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class IPCNotSent(ConnectionError):
+    """The request never reached the server, so sending it another way cannot transcribe it twice."""
+
+
+def _parse(address: str):
+    if address.startswith("tcp:"):
+        host, port = address[4:].rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+def _request(samples: np.ndarray, rate: int, source: str) -> tuple[bytes, bytes]:
+    header = json.dumps({"rate": int(rate), "format": "f32le", "source": source}).encode("utf-8")
+    return header, np.ascontiguousarray(samples, dtype="<f4").tobytes()
+
+
+# ---------------------------------------------------------------------------
+# Server (runs inside stt_server.py)
+# ---------------------------------------------------------------------------
+
+class IPCServer:
+    """Accept bridge connections and answer recognition requests with `handler`."""
+
+    def __init__(self, address: str, handler):
+        self.address = address
+        self._handler = handler
+        family, target = _parse(address)
+        if family == socket.AF_UNIX:
+            _remove_socket(target)  # left by an earlier server on the same address; a regular file makes bind fail
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(target)
+        self._sock.listen(16)
+
+    def start(self):
+        threading.Thread(target=self._serve, name="stt-ipc", daemon=True).start()
+        log.info("STT IPC listening on %s", self.address)
+        return self
+
+    def close(self):
+        try:
+            self._sock.close()
+        finally:
+            family, target = _parse(self.address)
+            if family == socket.AF_UNIX:
+                _remove_socket(target)
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._connection, args=(conn,), daemon=True).start()
+
+    def _connection(self, conn: socket.socket):
+        with conn:
+            while True:
+                try:
+                    header = recv_frame(conn, MAX_HEADER)
+                    if header is None:
+                        return
+                    body = recv_frame(conn, MAX_BODY)
+                    if body is None:
+                        return
+                    meta = json.loads(header.decode("utf-8"))
+                    result = self._handler(body, int(meta.get("rate", 16000)),
+                                           meta.get("format", "f32le"), meta.get("source", "ipc"))
+                except (ConnectionError, OSError):
+                    return
+                except Exception as e:
+                    result = {"error": f"Error processing audio: {e}"}
+                try:
+                    send_frames(conn, json.dumps(result).encode("utf-8"))
+                except OSError:
+                    return
+
+
+# ---------------------------------------------------------------------------
+# Client (used by the bridge)
+# ---------------------------------------------------------------------------
+
+class IPCClient:
+    """Persistent connection to an IPCServer; safe to share between threads (requests are serialised)."""
+
+    def __init__(self, address: str, timeout: float = 30.0):
+        self.address = address
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        family, target = _parse(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(target)
+        return sock
+
+    def recognize(self, samples: np.ndarray, rate: int, source: str = "bridge") -> dict:
+        header, body = _request(samples, rate, source)
+        with self._lock:
+            # The server never speaks first, so a readable idle connection means it was closed
+            # (e.g. the server restarted since the last request)
+            if self._sock is not None and select.select([self._sock], [], [], 0)[0]:
+                self._close_locked()
+            for attempt in (0, 1):
+                sent = False
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    send_frames(self._sock, header, body)
+                    sent = True
+                    reply = recv_frame(self._sock, MAX_HEADER)
+                    if reply is None:
+                        raise ConnectionError("STT IPC connection closed")
+                    return json.loads(reply.decode("utf-8"))
+                except (ConnectionError, OSError) as e:
+                    self._close_locked()
+                    # Once the request is out the server may already be transcribing it; never send it twice
+                    if sent:
+                        raise
+                    if attempt or isinstance(e, TimeoutError):
+                        raise IPCNotSent(f"STT IPC request not sent: {e}") from e
+
+    def _close_locked(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+
+class AsyncIPCClient:
+    """asyncio counterpart of IPCClient for the async bridge; requests on one connection are serialised."""
+
+    def __init__(self, address: str, timeout: float = 30.0):
+        self.address = address
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        family, target = _parse(self.address)
+        if family == socket.AF_UNIX:
+            return await asyncio.open_unix_connection(target)
+        return await asyncio.open_connection(*target)
+
+    async def _read_frame(self, limit: int) -> bytes:
+        (length,) = struct.unpack("<I", await self._reader.readexactly(4))
+        if length > limit:
+            raise ValueError(f"IPC frame too large: {length}")
+        return await self._reader.readexactly(length) if length else b""
+
+    async def recognize(self, samples: np.ndarray, rate: int, source: str = "bridge") -> dict:
+        header, body = _request(samples, rate, source)
+        async with self._lock:
+            if self._writer is not None and (self._reader.at_eof() or self._writer.is_closing()):
+                self._close_locked()  # closed by the server since the last request
+            for attempt in (0, 1):
+                sent = False
+                try:
+                    if self._writer is None:
+                        self._reader, self._writer = await asyncio.wait_for(self._connect(), self.timeout)
+                    self._writer.writelines((struct.pack("<I", len(header)), header,
+                                             struct.pack("<I", len(body)), body))
+                    await self._writer.drain()
+                    sent = True
+                    reply = await asyncio.wait_for(self._read_frame(MAX_HEADER), self.timeout)
+                    return json.loads(reply.decode("utf-8"))
+                except asyncio.CancelledError:
+                    # A reply may still be in flight; the connection is out of step, so drop it
+                    self._close_locked()
+                    raise
+                except (TimeoutError, asyncio.TimeoutError) as e:
+                    self._close_locked()
+                    if sent:
+                        raise
+                    raise IPCNotSent(f"STT IPC request not sent: {e!r}") from e
+                except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                    self._close_locked()
+                    if sent:
+                        raise
+                    if attempt:
+                        raise IPCNotSent(f"STT IPC request not sent: {e}") from e
+
+    def _close_locked(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def close(self):
+        async with self._lock:
+            self._close_locked()
@@ -1,10 +1,15 @@
-import whisper
 import json
 from flask import Flask, request, jsonify
 import os
 import io
 import logging
+import threading
+import time
 import numpy as np
+from resample import resample
+from stt_batcher import MicroBatcher
+from asr_engines import load_engine
+from stt_ipc import IPCServer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,7 +29,83 @@ app = Flask(__name__)
 
 
 
-model = whisper.load_model("small")
+# Backend: "whisper" (openai-whisper, fp32 PyTorch) or "faster-whisper" (CTranslate2, quantized)
+STT_ENGINE = os.getenv("STT_ENGINE", "whisper")
+STT_THREADS = int(os.getenv("STT_THREADS", "0"))
+STT_COMPUTE_TYPE = os.getenv("STT_COMPUTE_TYPE", "int8")
+
+STT_MODEL = os.getenv("STT_MODEL", "small")
+model = load_engine(STT_ENGINE, STT_MODEL, STT_THREADS, STT_COMPUTE_TYPE)
+
+# Cascade: a fast model answers first; clips it is unsure about are re-run on STT_MODEL
+STT_CASCADE = os.getenv("STT_CASCADE", "0").lower() in ("1", "true", "yes")
+STT_FAST_MODEL = os.getenv("STT_FAST_MODEL", "tiny")
+STT_CASCADE_MIN_LOGPROB = float(os.getenv("STT_CASCADE_MIN_LOGPROB", "-0.6"))
+STT_CASCADE_MAX_NO_SPEECH = float(os.getenv("STT_CASCADE_MAX_NO_SPEECH", "0.4"))
+fast_model = load_engine(STT_ENGINE, STT_FAST_MODEL, STT_THREADS, STT_COMPUTE_TYPE) if STT_CASCADE else None
+
+# Collect /recognize calls that arrive within STT_BATCH_WINDOW_MS into one batched decode
+STT_BATCHING = os.getenv("STT_BATCHING", "1").lower() in ("1", "true", "yes")
+STT_MAX_BATCH = int(os.getenv("STT_MAX_BATCH", "8"))
+STT_BATCH_WINDOW_MS = float(os.getenv("STT_BATCH_WINDOW_MS", "30"))
+
+
+def _confident(avg_logprob, no_speech_prob):
+    return avg_logprob >= STT_CASCADE_MIN_LOGPROB and no_speech_prob <= STT_CASCADE_MAX_NO_SPEECH
+
+
+def _result(tier, text, avg_logprob, no_speech_prob):
+    # Same no-speech rule transcribe() applies
+    silent = no_speech_prob > 0.6 and avg_logprob < -1.0
+    return {"text": "" if silent else text, "tier": tier,
+            "avg_logprob": round(float(avg_logprob), 3), "no_speech_prob": round(float(no_speech_prob), 3)}
+
+
+def _transcribe_batch(batch):
+    if fast_model is None:
+        return [_result(STT_MODEL, *r) for r in model.transcribe_batch(batch)]
+
+    first = fast_model.transcribe_batch(batch)
+    out = [_result(STT_FAST_MODEL, *r) if _confident(r[1], r[2]) else None for r in first]
+    retry = [i for i, r in enumerate(out) if r is None]
+    if retry:
+        log.info("Cascade: %d of %d clip(s) below confidence on %s, re-running on %s",
+                 len(retry), len(batch), STT_FAST_MODEL, STT_MODEL)
+        for i, r in zip(retry, model.transcribe_batch([batch[i] for i in retry])):
+            out[i] = _result(STT_MODEL, *r)
+    return out
+
+
+batcher = MicroBatcher(_transcribe_batch, STT_MAX_BATCH, STT_BATCH_WINDOW_MS) if STT_BATCHING else None
+
+# Set once the models have run one warm-up decode (in the background at startup); the bridge polls /health for it
+ready = threading.Event()
+
+
+def warm_up():
+    """Run one second of silence through every tier so the first real request pays no lazy-init cost."""
+    t0 = time.perf_counter()
+    try:
+        # Silence never passes the cascade's confidence check, so both tiers get exercised.
+        # Through the batcher when there is one, so the warm-up never decodes alongside its worker
+        silence = np.zeros(16000, dtype=np.float32)
+        if batcher is not None:
+            batcher.submit(silence).result()
+        else:
+            _transcribe_batch([silence])
+        log.info("Warm-up decode finished in %.2fs", time.perf_counter() - t0)
+    except Exception as e:
+        log.error("Warm-up decode failed (the first request will initialize lazily): %s", e)
+    finally:
+        ready.set()  # requests are held until this is set
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    body = {'status': 'ready' if ready.is_set() else 'loading', 'engine': model.name,
+            'fast_engine': fast_model.name if fast_model is not None else None,
+            'ipc': os.getenv("STT_IPC_ADDRESS")}
+    return jsonify(body), 200 if ready.is_set() else 503
 
 @app.route('/recognize', methods=['POST'])
 def recognize():
@@ -49,10 +130,11 @@ def recognize():
         source_channels = segment.channels
 
         
-        segment = segment.set_channels(1).set_frame_rate(16000)
+        segment = segment.set_channels(1)
 
         
-        samples = np.array(segment.get_array_of_samples(), dtype=np.float32) / 32768.0  
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32) / float(1 << (8 * segment.sample_width - 1))
+        samples = resample(samples, source_rate, 16000)
 
         
         if nr is not None:
@@ -67,28 +149,89 @@ def recognize():
     except Exception as e:
         return jsonify({'error': f'Failed to process audio: {e}'}), 400
 
+    return _recognize_samples(samples, log_source)
+
+
+# Little-endian sample formats accepted by /recognize_raw (X-Sample-Format header)
+RAW_FORMATS = {"f32le": ("<f4", 1.0), "s16le": ("<i2", 32768.0)}
+
+
+@app.route('/recognize_raw', methods=['POST'])
+def recognize_raw():
+    """Mono samples in the request body; X-Sample-Rate / X-Sample-Format describe them. No container, no pydub."""
+    fmt = request.headers.get('X-Sample-Format', 'f32le').lower()
+    if fmt not in RAW_FORMATS:
+        return jsonify({'error': f'Unsupported X-Sample-Format {fmt!r} (expected one of {", ".join(RAW_FORMATS)})'}), 400
     try:
-        
-        result = model.transcribe(
-            samples,
-            language="en",
-            fp16=False,
-            condition_on_previous_text=False
-        )
-        recognized_text = result["text"].strip()
+        source_rate = int(request.headers.get('X-Sample-Rate', '16000'))
+    except ValueError:
+        return jsonify({'error': 'X-Sample-Rate must be an integer'}), 400
+
+    body = request.get_data(cache=False)
+    try:
+        samples = _decode_raw(body, source_rate, fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    log_source = request.headers.get('X-Source', 'raw upload')
+    log.info("Received raw %s audio (%s): %.2f s at %d Hz", fmt, log_source, len(samples) / 16000, source_rate)
+    return _recognize_samples(samples, log_source)
 
-        log.info("Whisper recognition result for %s: %s", log_source, repr(recognized_text))
 
-        if not recognized_text:
-            return jsonify({'text': '', 'warning': 'No speech text recognized. Check audio content.'})
+def _decode_raw(body, source_rate, fmt):
+    dtype, scale = RAW_FORMATS[fmt]
+    if len(body) % np.dtype(dtype).itemsize:
+        raise ValueError('Body length is not a whole number of samples')
+    samples = np.frombuffer(body, dtype=dtype)
+    if scale != 1.0:
+        samples = samples.astype(np.float32) / scale
+    return resample(samples, source_rate, 16000)
 
-        return jsonify({'text': recognized_text})
 
+def _recognize_ipc(body, source_rate, fmt, log_source):
+    """IPC transport handler: same work as /recognize_raw, result returned as a dict."""
+    if fmt not in RAW_FORMATS:
+        return {'error': f'Unsupported sample format {fmt!r}'}
+    samples = _decode_raw(body, source_rate, fmt)
+    log.info("Received IPC %s audio (%s): %.2f s at %d Hz", fmt, log_source, len(samples) / 16000, source_rate)
+    return _recognize(samples, log_source)
+
+
+def _recognize_samples(samples, log_source):
+    try:
+        return jsonify(_recognize(samples, log_source))
     except Exception as e:
         return jsonify({'error': f'Error processing audio: {str(e)}'}), 500
 
+
+def _recognize(samples, log_source):
+    if not ready.is_set():
+        # Hold early requests (HTTP and IPC alike) until the warm-up decode has paid the lazy-init cost
+        log.info("Holding request from %s until warm-up finishes", log_source)
+        ready.wait()
+    if batcher is not None:
+        result = batcher.submit(samples).result()
+    else:
+        result = _transcribe_batch([samples])[0]
+    recognized_text = result["text"]
+
+    log.info("Whisper recognition result for %s (tier=%s, avg_logprob=%.3f): %s",
+             log_source, result["tier"], result["avg_logprob"], repr(recognized_text))
+
+    if not recognized_text:
+        return {'text': '', 'tier': result["tier"], 'warning': 'No speech text recognized. Check audio content.'}
+
+    return {'text': recognized_text, 'tier': result["tier"],
+            'avg_logprob': result["avg_logprob"], 'no_speech_prob': result["no_speech_prob"]}
+
 if __name__ == '__main__':
     print("Starting Whisper speech recognition server...")
-    print("Small model loaded successfully. Improved accuracy (~244MB) with offline capability.")
+    print(f"{model.name} model loaded successfully." + (f" Cascade enabled with {STT_FAST_MODEL} as the fast tier." if STT_CASCADE else ""))
     print("Noise reduction enabled for better performance in noisy environments.")
-    app.run(host='0.0.0.0', port=5001, debug=False)
\ No newline at end of file
+    # Serve while warming up, so /health can answer "loading" until the first decode is done
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    # Set by the bridge when it spawns this server; local callers skip HTTP entirely
+    ipc_address = os.getenv("STT_IPC_ADDRESS")
+    if ipc_address:
+        IPCServer(ipc_address, _recognize_ipc).start()
+    app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
\ No newline at end of file
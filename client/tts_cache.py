@@ -0,0 +1,235 @@
+"""
+tts_cache.py
+------------
+Content-addressed cache of synthesized speech.
+
+Companion replies repeat themselves a lot ("Hmm...", "I see.", greetings,
+stock phrases), and every repeat costs a full pyttsx3 + RVC + resample
+round.  Clips are keyed by what determines their samples:
+
+    sha256(key version | voice fingerprint | output rate | normalized text)
+
+where the voice fingerprint covers the RVC checkpoint (path, size and
+mtime, so retraining the model invalidates every entry) plus whatever
+else the caller passes in (pyttsx3 voice, pitch settings).  Text is
+normalized only in ways that do not change the rendered audio: Unicode
+NFKC and collapsed whitespace.  Case and punctuation are kept: SAPI reads
+"US" and "us" (or "IT" and "it") differently, and punctuation changes
+prosody.
+
+Two tiers, each a size-bounded LRU:
+    memory : float32 arrays, hit costs nothing
+    disk   : one .npy per clip under `cache_dir`, survives restarts;
+             recency is tracked through the file mtime
+
+Public API
+----------
+    cache = AudioCache(cache_dir, voice_fingerprint(model_path, voice_id), rate=48000)
+    samples = cache.get(text)          # float32 np.ndarray or None
+    cache.put(text, samples)
+    cache.stats() -> dict              # hits / misses / entries / bytes per tier
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+log = logging.getLogger("tts-cache")
+
+_WS = re.compile(r"\s+")
+# Bump whenever the key material changes, so older entries on disk are never served (2: text keeps its case)
+_KEY_VERSION = 2
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for keys: NFKC, whitespace collapsed, case kept."""
+    return _WS.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def voice_fingerprint(model_path: str, *extra) -> str:
+    """Identify a voice by its checkpoint file's identity plus any other settings that shape the output."""
+    try:
+        st = os.stat(model_path)
+        model = f"{os.path.abspath(model_path)}:{st.st_size}:{st.st_mtime_ns}"
+    except OSError:
+        model = f"{os.path.abspath(model_path)}:missing"
+    return "|".join([model, *(str(e) for e in extra)])
+
+
+class AudioCache:
+    """Memory + disk LRU of float32 clips keyed by voice, rate and normalized text. Thread-safe."""
+
+    def __init__(self, cache_dir: str, fingerprint: str, rate: int,
+                 memory_bytes: int = 64 * 2**20, disk_bytes: int = 512 * 2**20):
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+        self.rate = int(rate)
+        self.memory_bytes = max(0, int(memory_bytes))
+        self.disk_bytes = max(0, int(disk_bytes))
+        self._lock = threading.Lock()
+        self._mem: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._mem_used = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key -> file size, oldest first
+        self._disk_used = 0
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        if self.disk_bytes:
+            self._scan_disk()
+
+    def key(self, text: str) -> str:
+        material = f"{_KEY_VERSION}|{self.fingerprint}|{self.rate}|{normalize_text(text)}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, text: str):
+        """Cached samples for `text`, or None. A disk hit is promoted to memory."""
+        key = self.key(text)
+        with self._lock:
+            samples = self._mem.get(key)
+            if samples is not None:
+                self._mem.move_to_end(key)
+                self.hits_memory += 1
+                return samples
+            on_disk = key in self._disk
+
+        if on_disk:
+            path = self._path(key)
+            try:
+                samples = np.load(path, allow_pickle=False)
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                log.warning("Dropping unreadable cache entry %s: %s", key[:12], e)
+                self._forget_disk(key)
+            else:
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self.hits_disk += 1
+                    self._remember(key, samples)
+                return samples
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text: str, samples: np.ndarray):
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        samples.setflags(write=False)  # shared between callers; nobody may edit it in place
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, samples)
+            if not self.disk_bytes or key in self._disk or samples.nbytes > self.disk_bytes:
+                return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.save(f, samples, allow_pickle=False)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            log.warning("Could not write cache entry %s: %s", key[:12], e)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._disk[key] = size
+            self._disk_used += size
+            evicted = self._evict_disk()
+        for old in evicted:
+            self._remove_file(old)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+                "memory_entries": len(self._mem),
+                "memory_bytes": self._mem_used,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+            }
+
+    # ---- internals (callers of _remember/_evict_disk hold the lock) ----
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".npy")
+
+    def _remember(self, key: str, samples: np.ndarray):
+        if samples.nbytes > self.memory_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_used -= old.nbytes
+        self._mem[key] = samples
+        self._mem_used += samples.nbytes
+        while self._mem_used > self.memory_bytes:
+            _, dropped = self._mem.popitem(last=False)
+            self._mem_used -= dropped.nbytes
+
+    def _evict_disk(self) -> list[str]:
+        evicted = []
+        while self._disk_used > self.disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            evicted.append(key)
+        return evicted
+
+    def _forget_disk(self, key: str):
+        with self._lock:
+            size = self._disk.pop(key, None)
+            if size is not None:
+                self._disk_used -= size
+        self._remove_file(key)
+
+    def _remove_file(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _scan_disk(self):
+        """Rebuild the disk index from a previous run, oldest access first, and trim it to the budget."""
+        entries = []
+        try:
+            for shard in os.scandir(self.cache_dir):
+                if not shard.is_dir():
+                    continue
+                for f in os.scandir(shard.path):
+                    if f.name.endswith(".npy"):
+                        st = f.stat()
+                        entries.append((st.st_mtime, f.name[:-4], st.st_size))
+                    elif f.name.endswith(".tmp"):
+                        self._remove_tmp(f.path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            log.warning("Could not scan TTS cache at %s: %s", self.cache_dir, e)
+            return
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+        for key in self._evict_disk():
+            self._remove_file(key)
+        log.info("TTS cache: %d clips (%.1f MB) on disk at %s",
+                 len(self._disk), self._disk_used / 2**20, self.cache_dir)
+
+    @staticmethod
+    def _remove_tmp(path: str):
+        # Left over from a write that was interrupted by a crash
+        try:
+            os.remove(path)
+        except OSError:
+            pass
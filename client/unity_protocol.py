@@ -0,0 +1,122 @@
+"""
+unity_protocol.py
+-----------------
+Wire format between Unity and the bridge.
+
+Requests (Unity -> bridge)
+    v1 : u32 len | audio payload
+    v2 : u32 LE "UNI2" magic | u32 len | audio payload
+
+    The magic is far above the largest payload length the bridge accepts,
+    so a v1 request can never be mistaken for it.
+
+Responses (bridge -> Unity)
+    v1 : u32 len | JSON {"text", "audio"[, "error"]}, then a zero-length frame.
+         "audio" is the path of a WAV file in StreamingAssets.
+
+    v2 : a sequence of typed frames, each  u32 len | u8 type | body
+           TEXT  (1) : UTF-8 text delta; the reply is the concatenation of all of them
+           AUDIO (2) : u16 sentence | u32 sample rate | PCM16 LE mono samples
+                       (a sentence longer than AUDIO_CHUNK_BYTES arrives as several
+                       frames with the same sentence number, in order)
+           END   (3) : JSON {"text": full reply, "audio": WAV path or ""[, "error"]}
+         END is always the last frame; the bridge then closes the connection.
+         Audio frames are sent as each sentence finishes synthesis, so Unity can
+         start playback before the reply is complete and needs no shared disk.
+
+Public API
+----------
+    REQUEST_MAGIC
+    text_frame(delta) / audio_frames(pcm16, rate, sentence) / end_frame(payload) -> list of buffers
+    ResponseWriter(sock)      # v2 sender for one blocking socket
+"""
+
+import json
+import logging
+import struct
+import time
+
+from framing import send_vectored
+
+log = logging.getLogger("unity-protocol")
+
+REQUEST_MAGIC = int.from_bytes(b"UNI2", "little")
+
+TEXT = 1
+AUDIO = 2
+END = 3
+
+# ~0.7 s of 48 kHz mono per frame: small enough to start playing early, large enough to stay cheap
+AUDIO_CHUNK_BYTES = 65536
+
+_FRAME = struct.Struct("<IB")
+_AUDIO = struct.Struct("<HI")
+
+
+def text_frame(delta: str) -> list:
+    body = delta.encode("utf-8")
+    return [_FRAME.pack(len(body) + 1, TEXT), body]
+
+
+def audio_frames(pcm16, rate: int, sentence: int) -> list:
+    parts = []
+    view = memoryview(pcm16)
+    step = AUDIO_CHUNK_BYTES - AUDIO_CHUNK_BYTES % 2
+    for start in range(0, len(view), step):
+        chunk = view[start:start + step]
+        parts.append(_FRAME.pack(len(chunk) + 1 + _AUDIO.size, AUDIO))
+        parts.append(_AUDIO.pack(sentence & 0xFFFF, int(rate)))
+        parts.append(chunk)
+    return parts
+
+
+def end_frame(payload: dict) -> list:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return [_FRAME.pack(len(body) + 1, END), body]
+
+
+class ResponseWriter:
+    """Sends v2 frames on one Unity socket. After the first send error it goes quiet instead of raising."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.failed = False
+        self.text_sent = False
+        self.sentences_sent = 0
+        self.first_frame_at: float | None = None
+
+    def _send(self, parts) -> bool:
+        if self.failed or not parts:
+            return False
+        try:
+            send_vectored(self.sock, parts)
+        except OSError as e:
+            log.warning("Unity stopped receiving: %s", e)
+            self.failed = True
+            return False
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
+        return True
+
+    def text(self, delta: str) -> bool:
+        if not delta:
+            return False
+        sent = self._send(text_frame(delta))
+        self.text_sent |= sent
+        return sent
+
+    def audio_file(self, path: str) -> bool:
+        """Send the WAV at `path` as the next sentence's PCM16 frames."""
+        from pcm import read_pcm16
+        try:
+            pcm16, rate = read_pcm16(path)
+        except Exception as e:
+            log.warning("Could not read %s for streaming: %s", path, e)
+            return False
+        if not self._send(audio_frames(pcm16, rate, self.sentences_sent)):
+            return False
+        self.sentences_sent += 1
+        return True
+
+    def end(self, payload: dict) -> bool:
+        return self._send(end_frame(payload))
@@ -0,0 +1,124 @@
+"""
+vad.py
+------
+Energy / spectral voice activity detection for the Monika Unity Bridge.
+
+Runs after noise cancellation and before Whisper, so that Whisper only
+decodes audio that actually contains speech.
+
+Algorithm:
+  - Frame energy          : per-frame level in dBFS, compared against an
+    adaptive floor (a low percentile of the capture's own frame levels).
+  - Speech-band ratio     : share of frame energy between SPEECH_BAND_HZ;
+    broadband hiss and low rumble score low even when loud.
+  - Hangover / min length : speech decisions are dilated by HANGOVER_MS on
+    both sides and runs shorter than MIN_SPEECH_MS are dropped.
+  - Splitting             : speech runs are grouped into segments no longer
+    than MAX_SEGMENT_SECS, cutting only at pauses (hard cut if a single
+    run is longer than that).
+
+Public API
+----------
+    trim_silence(signal: np.ndarray, rate: int) -> (segments, dropped_secs)
+
+    `segments` is a list of float32 arrays (empty when the capture holds
+    no speech); `dropped_secs` is how much audio was removed.
+"""
+
+import logging
+import numpy as np
+
+log = logging.getLogger("vad")
+
+# ---------------------------------------------------------------------------
+# Tuneable constants
+# ---------------------------------------------------------------------------
+
+FRAME_MS          = 20          # ms  per analysis frame
+HOP_MS            = 10          # ms  between frames
+FLOOR_PERCENTILE  = 10          # frame-level percentile used as the noise floor
+ENERGY_MARGIN_DB  = 10.0        # frame must exceed the floor by this much …
+ABS_SPEECH_DB     = -35.0       # … or be at least this loud in absolute terms
+MIN_ENERGY_DB     = -55.0       # never speech below this level
+SPEECH_BAND_HZ    = (80, 4000)   # Hz  – voiced fundamentals through the main formants
+SPEECH_BAND_RATIO = 0.5         # min share of energy inside SPEECH_BAND_HZ
+HANGOVER_MS       = 200         # speech padding on each side of a run
+MIN_SPEECH_MS     = 120         # shorter runs are treated as clicks / noise
+MAX_SEGMENT_SECS  = 25.0        # Whisper decodes 30 s windows; stay below that
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _frame_features(signal: np.ndarray, rate: int):
+    """Return (frame, hop, level_db, band_ratio) for every full analysis frame."""
+    frame = int(rate * FRAME_MS / 1000)
+    hop = int(rate * HOP_MS / 1000)
+    frames = np.lib.stride_tricks.sliding_window_view(signal, frame)[::hop]
+
+    level_db = 10.0 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-12)
+
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame, 1.0 / rate)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    band_ratio = power[:, band].sum(axis=1) / (power.sum(axis=1) + 1e-20)
+    return frame, hop, level_db, band_ratio
+
+
+def _runs(mask: np.ndarray) -> list[tuple[int, int]]:
+    """[start, end) index pairs of consecutive True values."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def _speech_mask(level_db: np.ndarray, band_ratio: np.ndarray) -> np.ndarray:
+    floor = np.percentile(level_db, FLOOR_PERCENTILE)
+    loud = (level_db > floor + ENERGY_MARGIN_DB) | (level_db > ABS_SPEECH_DB)
+    return loud & (level_db > MIN_ENERGY_DB) & (band_ratio >= SPEECH_BAND_RATIO)
+
+
+def _group(runs: list[tuple[int, int]], max_len: int) -> list[tuple[int, int]]:
+    """Merge speech runs into spans of at most max_len samples, cutting at pauses."""
+    spans = []
+    for start, end in runs:
+        while end - start > max_len:
+            spans.append((start, start + max_len))
+            start += max_len
+        if spans and end - spans[-1][0] <= max_len:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def trim_silence(signal: np.ndarray, rate: int) -> tuple[list[np.ndarray], float]:
+    """Drop non-speech from `signal` and split long captures at pauses."""
+    signal = np.asarray(signal, dtype=np.float32)
+    total = len(signal) / rate if rate else 0.0
+    if len(signal) < int(rate * FRAME_MS / 1000):
+        return [], total
+
+    frame, hop, level_db, band_ratio = _frame_features(signal, rate)
+    mask = _speech_mask(level_db, band_ratio)
+
+    # Hangover: widen every decision by HANGOVER_MS, then drop short bursts
+    pad = max(1, HANGOVER_MS // HOP_MS)
+    if mask.any():
+        mask = np.convolve(mask.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), mode="same") > 0
+    min_frames = max(1, MIN_SPEECH_MS // HOP_MS) + 2 * pad
+    frame_runs = [(s, e) for s, e in _runs(mask) if e - s >= min_frames]
+
+    sample_runs = [(s * hop, min(len(signal), (e - 1) * hop + frame)) for s, e in frame_runs]
+    spans = _group(sample_runs, int(MAX_SEGMENT_SECS * rate))
+    segments = [signal[s:e] for s, e in spans]
+
+    kept = sum(len(seg) for seg in segments) / rate
+    dropped = total - kept
+    log.info("vad: %d segment(s), kept %.2f s of %.2f s (dropped %.2f s)",
+             len(segments), kept, total, dropped)
+    return segments, dropped
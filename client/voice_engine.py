@@ -0,0 +1,131 @@
+"""
+voice_engine.py
+---------------
+Persistent in-process RVC voice conversion for the Monika Unity Bridge.
+
+`rvc_infer.rvc_convert` rebuilds its Config, reloads HuBERT and the voice
+checkpoint on *every* call, then round-trips the audio through files.
+On CPU-only machines that load dominates per-reply latency.
+
+`RVCEngine` drives the same `rvc_infer` module, but performs the
+expensive setup exactly once:
+
+  - Config / device selection
+  - HuBERT feature extractor        (rvc_infer.load_hubert)
+  - voice checkpoint + VC pipeline  (rvc_infer.get_vc)
+  - pitch extractor                 (loaded lazily by the VC pipeline on
+                                     first use, so a short warm-up
+                                     conversion is run at load time)
+
+and then converts NumPy arrays to NumPy arrays with no disk I/O.
+
+Public API
+----------
+    engine = RVCEngine(model_path)
+    engine.load()                                   # once, at startup
+    out, out_rate = engine.convert(samples, rate)   # float32 mono in/out
+"""
+
+import os
+import sys
+import io
+import time
+import logging
+import threading
+import numpy as np
+from resample import resample
+
+log = logging.getLogger("voice-engine")
+
+# ---------------------------------------------------------------------------
+# Tuneable constants
+# ---------------------------------------------------------------------------
+
+HUBERT_RATE     = 16_000    # Hz  – RVC feature extractor input rate
+F0_METHOD       = os.getenv("RVC_F0_METHOD", "rmvpe")
+F0_UP_KEY       = int(os.getenv("RVC_F0_UP_KEY", "0"))
+INDEX_RATE      = 1.0
+FILTER_RADIUS   = 3
+RMS_MIX_RATE    = 0.5
+PROTECT         = 0.33
+WARMUP_SECS     = 0.5       # length of the silent warm-up clip
+
+
+class RVCEngine:
+    """Voice model kept resident between utterances. Not re-entrant; calls are serialised."""
+
+    def __init__(self, model_path: str, work_dir: str | None = None):
+        self.model_path = model_path
+        self.work_dir = work_dir or os.path.dirname(os.path.abspath(model_path))
+        self.target_rate = 0
+        self._rvc = None
+        self._if_f0 = 1
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._rvc is not None
+
+    def load(self):
+        """Load config, HuBERT, the checkpoint and the pitch extractor, then warm up."""
+        t0 = time.perf_counter()
+        import torch
+        import rvc_infer
+
+        if torch.cuda.is_available():
+            device, is_half = "cuda:0", True
+        else:
+            device, is_half = "cpu", False
+
+        # rvc_infer resolves hubert_base.pt / rmvpe.pt relative to the cwd and is chatty on stdout
+        prev = os.getcwd()
+        os.chdir(self.work_dir)
+        _so, _se = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+        try:
+            rvc_infer.config = rvc_infer.Config(device, is_half)
+            rvc_infer.load_hubert()
+            rvc_infer.get_vc(self.model_path)
+            self._rvc = rvc_infer
+            self._if_f0 = rvc_infer.cpt.get("f0", 1)
+            self.target_rate = int(rvc_infer.tgt_sr)
+            self.convert(np.zeros(int(HUBERT_RATE * WARMUP_SECS), dtype=np.float32), HUBERT_RATE)
+        finally:
+            sys.stdout, sys.stderr = _so, _se
+            os.chdir(prev)
+
+        log.info("RVC engine ready in %.2fs (device=%s, target=%d Hz, f0=%s)",
+                 time.perf_counter() - t0, device, self.target_rate, F0_METHOD)
+
+    def convert(self, samples: np.ndarray, rate: int) -> tuple[np.ndarray, int]:
+        """Convert mono float32 `samples` at `rate` Hz; returns (float32 samples, target rate)."""
+        if self._rvc is None:
+            raise RuntimeError("RVCEngine.convert called before load()")
+
+        audio = resample(samples, rate, HUBERT_RATE)
+        peak = float(np.abs(audio).max()) / 0.95 if len(audio) else 0.0
+        if peak > 1:
+            audio = audio / peak
+
+        rvc = self._rvc
+        with self._lock:
+            out = rvc.vc.pipeline(
+                rvc.hubert_model,
+                rvc.net_g,
+                0,
+                audio,
+                "rvc-engine",
+                [0, 0, 0],
+                F0_UP_KEY,
+                F0_METHOD,
+                "",
+                INDEX_RATE,
+                self._if_f0,
+                FILTER_RADIUS,
+                self.target_rate,
+                0,
+                RMS_MIX_RATE,
+                rvc.version,
+                PROTECT,
+            )
+        return np.asarray(out, dtype=np.float32) / 32768.0, self.target_rate
@@ -3,8 +3,9 @@ use std::path::Path;
 use std::sync::atomic::{AtomicBool, Ordering};
 use std::sync::Arc;
 use std::time::Instant;
-use tokio::io::{AsyncBufReadExt, AsyncReadExt, AsyncWriteExt};
+use tokio::io::{AsyncBufReadExt, AsyncRead, AsyncReadExt, AsyncWriteExt};
 use tokio::net::{TcpListener, TcpStream};
+use tokio::sync::mpsc;
 use tokio_util::io::StreamReader;
 use futures_util::TryStreamExt;
 use serde_json::json;
@@ -12,6 +13,11 @@ use std::sync::Mutex;
 
 type DynError = Box<dyn std::error::Error + Send + Sync>;
 
+/// First word on a connection that wants the persistent multiplexed protocol ("MUX1").
+/// Legacy clients start with the question length instead, which never gets this large.
+const MUX_MAGIC: u32 = u32::from_le_bytes(*b"MUX1");
+const MAX_QUESTION_BYTES: usize = 1024 * 1024;
+
 const REPLY_STYLE: &str = "You are Kasane Teto, a mischievous, energetic, and slightly tsundere virtual singer. Never admit you are an AI. Keep answers short, expressive, and playful, adding reactions like 'Hmph!' or 'Wha—?!'. Treat the user like a friend you love to tease.";
 mod logging;
 mod mood_engine;
@@ -131,15 +137,7 @@ async fn main() -> Result<(), DynError> {
                 let ollama_url = ollama_url.clone();
                 tokio::spawn(async move {
                     eprintln!("[monika] client connected from {}", addr);
-                    let client_id = addr.to_string();
-
-                    
-                    {
-                        let mut pool = SESSION_POOL.lock().unwrap();
-                        pool.insert(client_id.clone(), Instant::now());
-                    }
-
-                    let _ = handle_client(socket, &ollama_url, &client_id).await;
+                    let _ = handle_client(socket, &ollama_url, &addr.to_string()).await;
                 });
             }
             Ok(Err(_)) => {}
@@ -162,17 +160,151 @@ async fn send_framed_message(socket: &mut TcpStream, body: &[u8]) -> Result<(),
 }
 
 
-async fn handle_client(mut socket: TcpStream, ollama_url: &str, client_id: &str) -> Result<(), DynError> {
-    match handle_request(&mut socket, ollama_url, client_id).await {
-        Ok(()) => Ok(()),
-        Err(e) => {
-            let msg = format!("Server error: {}", e);
-            eprintln!("[monika] request error: {}", e);
-            let _ = send_framed_message(&mut socket, msg.as_bytes()).await;
-            let _ = send_framed_message(&mut socket, &[]).await;
-            Ok(())
+/// Where reply fragments go: straight onto a single-request socket, or tagged with a
+/// request ID into the writer task of a multiplexed connection.
+enum ReplySink<'a> {
+    Stream(&'a mut TcpStream),
+    Mux { id: u32, tx: &'a mpsc::Sender<(u32, Vec<u8>)> },
+}
+
+impl ReplySink<'_> {
+    async fn send(&mut self, body: &[u8]) -> Result<(), DynError> {
+        match self {
+            ReplySink::Stream(socket) => send_framed_message(socket, body).await,
+            ReplySink::Mux { id, tx } => tx
+                .send((*id, body.to_vec()))
+                .await
+                .map_err(|_| "connection writer closed".into()),
+        }
+    }
+}
+
+
+fn touch_session(client_id: &str) {
+    let mut pool = SESSION_POOL.lock().unwrap();
+    pool.insert(client_id.to_string(), Instant::now());
+}
+
+
+async fn handle_client(mut socket: TcpStream, ollama_url: &str, addr: &str) -> Result<(), DynError> {
+    let t = Instant::now();
+    let mut first = [0u8; 4];
+    socket.read_exact(&mut first).await?;
+    let first = u32::from_le_bytes(first);
+    if first == MUX_MAGIC {
+        return handle_mux_client(socket, ollama_url, addr).await;
+    }
+
+    // Legacy: one question per connection, identified by the peer address
+    touch_session(addr);
+    let result = async {
+        let question = read_question(&mut socket, first as usize).await?;
+        let read_tcp_ms = t.elapsed().as_secs_f64() * 1000.0;
+        answer_question(&mut ReplySink::Stream(&mut socket), ollama_url, addr, &question, read_tcp_ms).await
+    }
+    .await;
+    if let Err(e) = result {
+        eprintln!("[monika] request error: {}", e);
+        let mut sink = ReplySink::Stream(&mut socket);
+        let _ = sink.send(format!("Server error: {}", e).as_bytes()).await;
+        let _ = sink.send(&[]).await;
+    }
+    Ok(())
+}
+
+
+async fn read_question<R: AsyncRead + Unpin>(reader: &mut R, length: usize) -> Result<String, DynError> {
+    if length > MAX_QUESTION_BYTES {
+        return Err(format!("question too long: {} bytes", length).into());
+    }
+    let mut question_bytes = vec![0u8; length];
+    reader.read_exact(&mut question_bytes).await?;
+    Ok(String::from_utf8(question_bytes)?)
+}
+
+
+/// Persistent connection carrying any number of requests, possibly concurrently.
+///
+/// After the magic word the client sends one hello frame (`u32 len | session id`),
+/// which the server acknowledges with a reply frame for request ID 0 carrying the
+/// session id it settled on. Requests are `u32 request_id | u32 len | question`
+/// (IDs other than 0); every reply frame is `u32 request_id | u32 len | body`, and a
+/// zero-length body ends that request.
+/// The session id (falling back to the peer address when empty) keys the mood
+/// engine and session pool, so it stays stable across reconnects.
+async fn handle_mux_client(socket: TcpStream, ollama_url: &str, addr: &str) -> Result<(), DynError> {
+    let (mut reader, mut writer) = socket.into_split();
+
+    let mut len = [0u8; 4];
+    reader.read_exact(&mut len).await?;
+    let session = read_question(&mut reader, u32::from_le_bytes(len) as usize).await?;
+    let client_id = if session.trim().is_empty() { addr.to_string() } else { session.trim().to_string() };
+    touch_session(&client_id);
+    eprintln!("[monika] {} opened persistent session '{}'", addr, client_id);
+
+    let (tx, mut rx) = mpsc::channel::<(u32, Vec<u8>)>(64);
+    let writer_task = tokio::spawn(async move {
+        while let Some((id, body)) = rx.recv().await {
+            let mut frame = Vec::with_capacity(8 + body.len());
+            frame.extend_from_slice(&id.to_le_bytes());
+            frame.extend_from_slice(&(body.len() as u32).to_le_bytes());
+            frame.extend_from_slice(&body);
+            if writer.write_all(&frame).await.is_err() {
+                break;
+            }
+        }
+    });
+    let _ = tx.send((0, client_id.as_bytes().to_vec())).await;
+
+    let mut served: u64 = 0;
+    loop {
+        let mut header = [0u8; 8];
+        if reader.read_exact(&mut header).await.is_err() {
+            break;
         }
+        // Timed from the header, not from when we started waiting for it (that is idle time)
+        let t = Instant::now();
+        let id = u32::from_le_bytes([header[0], header[1], header[2], header[3]]);
+        let length = u32::from_le_bytes([header[4], header[5], header[6], header[7]]) as usize;
+        if length > MAX_QUESTION_BYTES {
+            // The body is still on the wire and would be parsed as headers; the stream cannot be
+            // resynchronised, so answer this request with an error and close the connection
+            eprintln!("[monika] request {} from {}: question too long ({} bytes), closing", id, addr, length);
+            let _ = tx.send((id, format!("Server error: question too long: {} bytes", length).into_bytes())).await;
+            let _ = tx.send((id, Vec::new())).await;
+            break;
+        }
+        let mut question_bytes = vec![0u8; length];
+        if reader.read_exact(&mut question_bytes).await.is_err() {
+            break;
+        }
+        let read_tcp_ms = t.elapsed().as_secs_f64() * 1000.0;
+        // Invalid UTF-8 only fails this request; the body was consumed, so the stream stays in sync
+        let question: Result<String, DynError> = String::from_utf8(question_bytes).map_err(|e| e.into());
+        served += 1;
+
+        let tx = tx.clone();
+        let ollama_url = ollama_url.to_string();
+        let client_id = client_id.clone();
+        tokio::spawn(async move {
+            let mut sink = ReplySink::Mux { id, tx: &tx };
+            let result = match question {
+                Ok(q) => answer_question(&mut sink, &ollama_url, &client_id, &q, read_tcp_ms).await,
+                Err(e) => Err(e),
+            };
+            if let Err(e) = result {
+                eprintln!("[monika] request {} error: {}", id, e);
+                let _ = sink.send(format!("Server error: {}", e).as_bytes()).await;
+                let _ = sink.send(&[]).await;
+            }
+        });
     }
+
+    // In-flight requests still hold senders; the writer drains them before exiting
+    drop(tx);
+    let _ = writer_task.await;
+    eprintln!("[monika] session '{}' from {} closed after {} request(s)", client_id, addr, served);
+    Ok(())
 }
 
 
@@ -185,35 +317,28 @@ fn fmt_timing_rows(rows: &[(&str, f64)]) -> String {
 }
 
 
-async fn handle_request(socket: &mut TcpStream, ollama_url: &str, client_id: &str) -> Result<(), DynError> {
+async fn answer_question(
+    sink: &mut ReplySink<'_>,
+    ollama_url: &str,
+    client_id: &str,
+    question: &str,
+    read_tcp_ms: f64,
+) -> Result<(), DynError> {
     let wall = Instant::now();
 
     
     let t = Instant::now();
-    let mut length_bytes = [0u8; 4];
-    socket.read_exact(&mut length_bytes).await?;
-    let question_length = u32::from_le_bytes(length_bytes) as usize;
-    let mut question_bytes = vec![0u8; question_length];
-    socket.read_exact(&mut question_bytes).await?;
-    let question = String::from_utf8(question_bytes)?;
-    let read_tcp_ms = t.elapsed().as_secs_f64() * 1000.0;
-
-    
-    let t = Instant::now();
-    let (mood, elo) = mood_engine::record_interaction(client_id, &question).await;
+    let (mood, elo) = mood_engine::record_interaction(client_id, question).await;
     let mood_ms = t.elapsed().as_secs_f64() * 1000.0;
 
     eprintln!("[monika] streaming from Ollama (mood={} elo={:.1}) …", mood, elo);
 
     
-    {
-        let mut pool = SESSION_POOL.lock().unwrap();
-        pool.insert(client_id.to_string(), Instant::now());
-    }
+    touch_session(client_id);
 
     
     let (raw_answer, om) =
-        query_ollama_streaming(ollama_url, &question, &mood, socket).await?;
+        query_ollama_streaming(ollama_url, question, &mood, sink).await?;
 
     let ollama_sum_ms = om.post_send_ms + om.stream_drain_ms;
 
@@ -224,7 +349,7 @@ async fn handle_request(socket: &mut TcpStream, ollama_url: &str, client_id: &st
 
     
     let t = Instant::now();
-    send_framed_message(socket, &[]).await?;
+    sink.send(&[]).await?;
     let send_eof_ms = t.elapsed().as_secs_f64() * 1000.0;
 
     
@@ -306,7 +431,7 @@ async fn query_ollama_streaming(
     ollama_url: &str,
     question: &str,
     culture: &str,
-    socket: &mut TcpStream,
+    sink: &mut ReplySink<'_>,
 ) -> Result<(String, OllamaMeta), DynError> {
     let model = env::var("OLLAMA_MODEL").unwrap_or_else(|_| "qwen2.5:7b".to_string());
 
@@ -396,7 +521,7 @@ async fn query_ollama_streaming(
             eprintln!("[monika] chunk #{}: got '{}' (done={})", chunk_count, fragment, is_done);
             full_text.push_str(&fragment);
             
-            send_framed_message(socket, fragment.as_bytes()).await?;
+            sink.send(fragment.as_bytes()).await?;
         } else {
             eprintln!("[monika] chunk #{}: empty response (done={})", chunk_count, is_done);
         }